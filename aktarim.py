@@ -0,0 +1,321 @@
+import pandas as pd
+import numpy as np
+import openpyxl
+import csv
+import io
+import os
+import tempfile
+import uuid
+import time
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from sqlalchemy import text
+from olcum import olculen
+from veritabani import TARIH_SUTUNLARI, tablo_dogrula, kimlik_ifadesi, sorgu_hazirla, cerceveyi_isle, gosterime_hazirla
+
+# --- AKILLI SÜTUN EŞLEŞTİRME ---
+GECERLI_SUTUNLAR = [
+    'basvuru_no', 'firma_adi', 'marka', 'arac_kategori', 'arac_tipi',
+    'varyant', 'versiyon', 'ticari_ad', 'gtip_no', 'birim', 'uretim_ulkesi',
+    'arac_sayisi', 'sasi_no', 'basvuru_tarihi', 'secim_tarihi', 'il',
+    'durum', 'notlar', 'ekleyen_kullanici'
+]
+PARCA_BOYUTU = 5000
+
+def akilli_sutun_eslestir(df_columns):
+    # Aynı başlık imzası (aynı firmanın aynı şablonu) için profil bir kez çıkarılır
+    basliklar = tuple(df_columns)
+    return dict(zip(basliklar, _eslestirme_profili(basliklar)))
+
+@lru_cache(maxsize=512)
+def _eslestirme_profili(basliklar):
+    yeni = {}
+    for col in basliklar:
+        tc = str(col).lower().replace(" ", "").replace("_", "").replace(".", "").replace("ş", "s").replace("ı", "i").replace("ğ", "g").replace("ü", "u").replace("ç", "c").replace("ö", "o")
+        if "basvuru" in tc: yeni[col] = "basvuru_no"
+        elif "firma" in tc or "kurum" in tc: yeni[col] = "firma_adi"
+        elif "marka" in tc: yeni[col] = "marka"
+        elif "kategori" in tc: yeni[col] = "arac_kategori"
+        elif "gtip" in tc: yeni[col] = "gtip_no"  # DÜZELTME: GTİP KONTROLÜ TİP'TEN ÖNCE YAPILMALI!
+        elif "tip" in tc: yeni[col] = "arac_tipi"
+        elif "varyant" in tc or "variant" in tc: yeni[col] = "varyant"
+        elif "versiyon" in tc or "version" in tc: yeni[col] = "versiyon"
+        elif "ticari" in tc: yeni[col] = "ticari_ad"
+        elif "birim" in tc or "sube" in tc or "hizmet" in tc: yeni[col] = "birim"
+        elif "ulke" in tc: yeni[col] = "uretim_ulkesi"
+        elif "sayi" in tc or "adet" in tc: yeni[col] = "arac_sayisi"
+        elif "sasi" in tc or "vin" in tc: yeni[col] = "sasi_no"
+        else: yeni[col] = col
+    return tuple(yeni[col] for col in basliklar)
+
+# --- DOSYAYI PARÇA PARÇA OKUMA ---
+def _excel_parcalari(dosya, parca_boyutu):
+    wb = openpyxl.load_workbook(dosya, read_only=True, data_only=True)
+    try:
+        satirlar = wb.worksheets[0].iter_rows(values_only=True)
+        baslik = next(satirlar, None)
+        if baslik is None: return
+        tampon = []
+        for satir in satirlar:
+            if all(v is None for v in satir): continue
+            tampon.append(satir)
+            if len(tampon) >= parca_boyutu: yield pd.DataFrame(tampon, columns=baslik); tampon = []
+        if tampon: yield pd.DataFrame(tampon, columns=baslik)
+    finally: wb.close()
+
+def dosyayi_parcala(dosya, ad, parca_boyutu=PARCA_BOYUTU):
+    if ad.endswith('.csv'): yield from pd.read_csv(dosya, chunksize=parca_boyutu)
+    else: yield from _excel_parcalari(dosya, parca_boyutu)
+
+def _tarihe_cevir(seri):
+    # Önce ISO (2026-03-01), olmazsa Türkçe gün-önce biçimi (01.03.2026)
+    iso = pd.to_datetime(seri, errors='coerce', format='ISO8601')
+    return iso.fillna(pd.to_datetime(seri, errors='coerce', format='mixed', dayfirst=True))
+
+def parcayi_hazirla(parca, ekleyen, varsayilanlar):
+    parca = parca.rename(columns=akilli_sutun_eslestir(parca.columns))
+    parca = parca.loc[:, ~parca.columns.duplicated()]
+    parca['ekleyen_kullanici'] = ekleyen
+    for k, v in varsayilanlar.items():
+        if k not in parca.columns: parca[k] = v
+    for c in TARIH_SUTUNLARI:
+        if c in parca.columns: parca[c] = _tarihe_cevir(parca[c]).dt.strftime('%Y-%m-%d')
+    return parca.reindex(columns=GECERLI_SUTUNLAR).replace({np.nan: None})
+
+# --- TAMPON TABLO (COPY) VE BİRLEŞTİRME (ON CONFLICT) ---
+TAMPON_DDL = "CREATE UNLOGGED TABLE IF NOT EXISTS aktarim_tampon (aktarim_id TEXT NOT NULL, satir_no INTEGER NOT NULL, " + \
+    ", ".join(f"{c} TEXT" for c in GECERLI_SUTUNLAR) + ", olusturma TIMESTAMP DEFAULT now())"
+
+TAMPON_COPY = f"COPY aktarim_tampon (aktarim_id, satir_no, {', '.join(GECERLI_SUTUNLAR)}) FROM STDIN WITH (FORMAT csv)"
+
+def _csv_yaz(f, aktarim_id, parca, baslangic):
+    w = csv.writer(f)
+    for i, satir in enumerate(parca.itertuples(index=False, name=None), start=baslangic):
+        w.writerow([aktarim_id, i] + ["" if v is None else str(v) for v in satir])
+
+def _copy_ile_yaz(cursor, aktarim_id, parca, baslangic):
+    buf = io.StringIO(); _csv_yaz(buf, aktarim_id, parca, baslangic)
+    buf.seek(0)
+    cursor.copy_expert(TAMPON_COPY, buf)
+
+def _mukerrerleri_ayikla(cursor, aktarim_id):
+    # Mevcut başvuru numaraları (arşivdekiler dahil) DB içinde anti-join ile düşülür (ix_denetimler_basvuru_no)
+    cursor.execute("""DELETE FROM aktarim_tampon t WHERE t.aktarim_id = %s AND t.basvuru_no IS NOT NULL
+        AND (EXISTS (SELECT 1 FROM denetimler d WHERE d.basvuru_no = t.basvuru_no)
+             OR EXISTS (SELECT 1 FROM denetimler_arsiv a WHERE a.basvuru_no = t.basvuru_no))""", (aktarim_id,))
+    atlanan = cursor.rowcount
+    # Aynı firma/marka/tip başka bir kayıtta (arşivdekiler dahil) var mı (ix_denetimler_kimlik, ix_denetimler_arsiv_kimlik)
+    cursor.execute(f"""SELECT EXISTS (SELECT 1 FROM aktarim_tampon t WHERE t.aktarim_id = %s
+        AND (EXISTS (SELECT 1 FROM denetimler d WHERE d.kimlik_anahtari = {kimlik_ifadesi('t.')})
+             OR EXISTS (SELECT 1 FROM denetimler_arsiv a WHERE a.kimlik_anahtari = {kimlik_ifadesi('t.')})))""", (aktarim_id,))
+    return atlanan, cursor.fetchone()[0]
+
+@olculen()
+def dosyayi_tampona_al(engine, dosya, ad, ekleyen, varsayilanlar):
+    # Dosya PARCA_BOYUTU'luk parçalar halinde okunur, her parça COPY ile tampona yazılır (sabit bellek)
+    aktarim_id = uuid.uuid4().hex
+    sonuc = {'aktarim_id': aktarim_id, 'okunan': 0, 'atlanan': 0, 'tamponda': 0, 'cakisma': False}
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM aktarim_tampon WHERE olusturma < now() - interval '1 day'")
+        for parca in dosyayi_parcala(dosya, ad):
+            parca = parcayi_hazirla(parca, ekleyen, varsayilanlar)
+            _copy_ile_yaz(cursor, aktarim_id, parca, sonuc['okunan'])
+            sonuc['okunan'] += len(parca)
+        sonuc['atlanan'], sonuc['cakisma'] = _mukerrerleri_ayikla(cursor, aktarim_id)
+        sonuc['tamponda'] = sonuc['okunan'] - sonuc['atlanan']
+        conn.commit()
+    finally: conn.close()
+    return sonuc
+
+# --- ÇOKLU DOSYA: AYRIŞTIRMA SÜREÇ HAVUZUNDA ---
+# Havuz süreç başına bir kez (spawn) açılır ve yaşamaya devam eder; işçilerdeki eşleştirme profili
+# önbelleği böylece partiler arasında korunur. Tampona yazma ve mükerrer ayıklama ana süreçte, tek transaction'da.
+# Bir işçi çökerse (OOM, segfault) havuz BrokenProcessPool ile kalıcı olarak bozulur: yenisi açılır ve o an
+# havuzdaki dosyaların hepsi şüpheli sayılır. Şüpheliler, havuz boşaldıktan sonra tek tek ve yalnız başlarına
+# yeniden denenir; yalnızken de havuzu çökerten dosya hatalı olarak raporlanır, yanındakiler etkilenmez.
+# Bellek sınırlı kalır: işçi her parçayı COPY'ye hazır CSV olarak diske yazar (parçalar sürece dönmez),
+# ana süreçte aynı anda en fazla AKTARIM_ISCI_SAYISI dosyanın baytı bulunur ve parti toplamı sınırlıdır.
+AKTARIM_ISCI_SAYISI = max(1, min(4, (os.cpu_count() or 2) - 1))
+AKTARIM_PARTI_SINIRI = 200 * 1024 * 1024
+_havuz = {'havuz': None}
+_havuz_kilidi = threading.Lock()
+
+def _isci_havuzu(bozuk=None):
+    with _havuz_kilidi:
+        if bozuk is not None and _havuz['havuz'] is bozuk:
+            bozuk.shutdown(wait=False, cancel_futures=True); _havuz['havuz'] = None
+        if _havuz['havuz'] is None:
+            _havuz['havuz'] = ProcessPoolExecutor(max_workers=AKTARIM_ISCI_SAYISI, mp_context=multiprocessing.get_context('spawn'))
+        return _havuz['havuz']
+
+def dosyayi_hazirla(veri, ad, ekleyen, varsayilanlar, aktarim_id, baslangic):
+    # İşçi süreçte çalışır: dosya baytlarından tampona COPY ile yüklenecek geçici CSV; (yol, satır, süre) döner
+    t0 = time.perf_counter()
+    fd, yol = gecici_dosya("tse_aktarim_", ".csv")
+    satir = 0
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            for p in dosyayi_parcala(io.BytesIO(veri), ad):
+                p = parcayi_hazirla(p, ekleyen, varsayilanlar)
+                _csv_yaz(f, aktarim_id, p, baslangic + satir); satir += len(p)
+    except BaseException: os.remove(yol); raise
+    return yol, satir, time.perf_counter() - t0
+
+def _baytlar(dosya):
+    return dosya if isinstance(dosya, bytes) else dosya.getvalue()
+
+@olculen()
+def dosyalari_tampona_al(engine, dosyalar, ekleyen, varsayilanlar, ilerleme=None):
+    # dosyalar: [(ad, bayt ya da getvalue() destekleyen dosya), ...]; tümü tek aktarim_id altında toplanır.
+    # ilerleme(dosya_ozeti, biten, toplam)
+    aktarim_id = uuid.uuid4().hex
+    sonuc = {'aktarim_id': aktarim_id, 'okunan': 0, 'atlanan': 0, 'tamponda': 0, 'cakisma': False, 'dosyalar': []}
+    bekleyen, supheli, isler = deque((sira, ad, dosya) for sira, (ad, dosya) in enumerate(dosyalar)), deque(), {}
+    # Her dosyanın satir_no aralığı sira * adım'dan başlar (INTEGER sınırında); dosya içi sıra korunur
+    adim = (2**31 - 1) // max(len(dosyalar), 1)
+    havuz = _isci_havuzu()
+    def gonder(sira, ad, dosya, yalniz=False):
+        nonlocal havuz
+        veri = _baytlar(dosya); args = (dosyayi_hazirla, veri, ad, ekleyen, varsayilanlar, aktarim_id, sira * adim)
+        try: is_ = havuz.submit(*args)
+        except BrokenProcessPool: havuz = _isci_havuzu(bozuk=havuz); is_ = havuz.submit(*args)
+        isler[is_] = (sira, ad, dosya, len(veri), yalniz)
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM aktarim_tampon WHERE olusturma < now() - interval '1 day'")
+        while bekleyen or supheli or isler:
+            # Şüpheli varken yeni dosya gönderilmez; havuz boşalınca şüpheliler birer birer, yalnız çalışır
+            if supheli:
+                if not isler: gonder(*supheli.popleft(), yalniz=True)
+            else:
+                while bekleyen and len(isler) < AKTARIM_ISCI_SAYISI: gonder(*bekleyen.popleft())
+            biten, _ = wait(isler, return_when=FIRST_COMPLETED)
+            for is_ in biten:
+                sira, ad, dosya, boyut, yalniz = isler.pop(is_)
+                ozet = {'dosya': ad, 'bayt': boyut, 'satir': 0, 'ayristirma_sn': 0.0, 'yazma_sn': 0.0, 'satir_sn': 0.0, 'hata': None}
+                try: yol, ozet['satir'], ozet['ayristirma_sn'] = is_.result()
+                except BrokenProcessPool:
+                    havuz = _isci_havuzu(bozuk=havuz)
+                    if not yalniz: supheli.append((sira, ad, dosya)); continue
+                    ozet['hata'] = "İşçi süreç çöktü (dosya tek başına da işlenemedi)"; yol = None
+                except Exception as e: ozet['hata'] = str(e)[:200]; yol = None
+                if yol:
+                    t0 = time.perf_counter()
+                    try:
+                        with open(yol, encoding='utf-8') as f: cursor.copy_expert(TAMPON_COPY, f)
+                    finally: os.remove(yol)
+                    ozet['yazma_sn'] = time.perf_counter() - t0
+                    sonuc['okunan'] += ozet['satir']
+                ozet['satir_sn'] = ozet['satir'] / max(ozet['ayristirma_sn'] + ozet['yazma_sn'], 1e-9)
+                sonuc['dosyalar'].append(ozet)
+                if ilerleme: ilerleme(ozet, len(sonuc['dosyalar']), len(dosyalar))
+        sonuc['atlanan'], sonuc['cakisma'] = _mukerrerleri_ayikla(cursor, aktarim_id)
+        sonuc['tamponda'] = sonuc['okunan'] - sonuc['atlanan']
+        conn.commit()
+    finally:
+        conn.close()
+        # Hata/iptal halinde henüz yüklenmemiş geçici CSV'ler de silinir
+        for is_ in isler:
+            if is_.done() and not is_.cancelled() and not is_.exception() and os.path.exists(is_.result()[0]): os.remove(is_.result()[0])
+    return sonuc
+
+@olculen()
+def tampondan_aktar(engine, aktarim_id):
+    # Zorunlu alanı boş olanlar reddedilir, mevcut şasiler ON CONFLICT (arşivdekiler NOT EXISTS) ile sessizce atlanır
+    secim = ", ".join(f"NULLIF({c}, '')::date" if c in TARIH_SUTUNLARI else ("COALESCE(durum, 'Şasi Bekliyor')" if c == 'durum' else c) for c in GECERLI_SUTUNLAR)
+    with engine.begin() as conn:
+        toplam, eksik = conn.execute(text("SELECT COUNT(*), COUNT(*) FILTER (WHERE firma_adi IS NULL OR arac_tipi IS NULL) FROM aktarim_tampon WHERE aktarim_id = :a"), {'a': aktarim_id}).one()
+        # İl sorumlularına bildirim aynı ifadede mail kutusuna yazılır: kayıtlar eklendiyse bildirim de kesin kuyrukta
+        il_ozeti = dict(conn.execute(text(f"""WITH eklenen AS (
+                INSERT INTO denetimler ({', '.join(GECERLI_SUTUNLAR)})
+                SELECT {secim} FROM aktarim_tampon t
+                WHERE aktarim_id = :a AND firma_adi IS NOT NULL AND arac_tipi IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM denetimler_arsiv a WHERE a.sasi_no = t.sasi_no) ORDER BY satir_no
+                ON CONFLICT (sasi_no) DO NOTHING RETURNING il),
+            sayim AS (SELECT il, COUNT(*) AS adet FROM eklenen GROUP BY il),
+            bildirim AS (
+                INSERT INTO mail_kutusu (alici, konu, icerik)
+                SELECT k.email, 'TSE Sistemi - ' || s.il || ' İçin Yeni Veri',
+                       'Merhaba <b>' || k.kullanici_adi || '</b>,<br>Sorumlu olduğunuz <b>' || s.il || '</b> ili için sisteme <b>' || s.adet || ' adet</b> yeni kayıt yüklenmiştir.'
+                FROM sayim s JOIN kullanicilar k ON k.sorumlu_il = s.il AND k.onay_durumu = 1
+                WHERE position('@' IN k.email) > 0)
+            SELECT il, adet FROM sayim"""), {'a': aktarim_id}).all())
+        conn.execute(text("DELETE FROM aktarim_tampon WHERE aktarim_id = :a"), {'a': aktarim_id})
+    eklenen = sum(il_ozeti.values())
+    return {'eklenen': eklenen, 'eksik_alan': eksik, 'mukerrer_sasi': toplam - eksik - eklenen, 'il_ozeti': il_ozeti}
+
+def tamponu_temizle(engine, aktarim_id):
+    with engine.begin() as conn: conn.execute(text("DELETE FROM aktarim_tampon WHERE aktarim_id = :a"), {'a': aktarim_id})
+
+# --- GEÇİCİ DOSYALAR ---
+# Rapor ve aktarım CSV'leri ayrı bir klasörde tutulur; yarım kalan oturumların bıraktıkları
+# zamanlayıcıdaki temizlik göreviyle GECICI_SAKLAMA_SN'den eski olunca silinir.
+GECICI_KLASOR = os.path.join(tempfile.gettempdir(), "tse_gecici")
+GECICI_SAKLAMA_SN = 3600
+
+def gecici_dosya(prefix, suffix):
+    os.makedirs(GECICI_KLASOR, exist_ok=True)
+    return tempfile.mkstemp(prefix=prefix, suffix=suffix, dir=GECICI_KLASOR)
+
+def gecici_dosyalari_temizle(saklama_sn=GECICI_SAKLAMA_SN):
+    silinen, sinir = 0, time.time() - saklama_sn
+    for giris in (os.scandir(GECICI_KLASOR) if os.path.isdir(GECICI_KLASOR) else ()):
+        try:
+            if giris.is_file() and giris.stat().st_mtime < sinir: os.remove(giris.path); silinen += 1
+        except FileNotFoundError: pass
+    return silinen
+
+# --- DIŞA AKTARIM (istek üzerine, akışlı) ---
+# Satırlar sunucu taraflı imleçten parça parça çekilip doğrudan diske yazılır; bellek kullanımı sabittir.
+DISA_AKTARIM_BICIMLERI = {
+    'XLSX': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+def _parcalari_akit(engine, kosul, duzenle, tablo):
+    where, params = kosul
+    sql = f"SELECT * FROM {tablo_dogrula(tablo)} WHERE {where} ORDER BY id DESC"
+    with engine.connect().execution_options(stream_results=True) as conn:
+        sonuc = conn.execute(sorgu_hazirla(sql, params), params)
+        kolonlar = list(sonuc.keys())
+        for parca in sonuc.partitions(PARCA_BOYUTU):
+            yield duzenle(cerceveyi_isle(pd.DataFrame(parca, columns=kolonlar)))
+
+@olculen()
+def disa_aktar(engine, kosul, bicim, duzenle=lambda df: df, tablo='denetimler'):
+    uzanti = DISA_AKTARIM_BICIMLERI[bicim][0]
+    fd, yol = gecici_dosya("tse_rapor_", f".{uzanti}"); os.close(fd)
+    parcalar = _parcalari_akit(engine, kosul, duzenle, tablo)
+    if bicim == 'XLSX':
+        wb = openpyxl.Workbook(write_only=True); ws = wb.create_sheet()
+        ilk = True
+        for parca in map(gosterime_hazirla, parcalar):
+            if ilk: ws.append(list(parca.columns)); ilk = False
+            for satir in parca.itertuples(index=False, name=None): ws.append(list(satir))
+        wb.save(yol)
+    elif bicim == 'CSV':
+        with open(yol, 'w', encoding='utf-8-sig', newline='') as f:
+            for i, parca in enumerate(map(gosterime_hazirla, parcalar)): parca.to_csv(f, header=(i == 0), index=False)
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        yazici = None
+        try:
+            for parca in parcalar:
+                # Tipler korunur; metin/kategori sütunları parçalar arası şema sabit kalsın diye 'string'
+                parca = parca.astype({c: 'string' for c in parca.columns if parca[c].dtype == object or isinstance(parca[c].dtype, pd.CategoricalDtype)})
+                tablo = pa.Table.from_pandas(parca, preserve_index=False, schema=yazici.schema if yazici else None)
+                if yazici is None: yazici = pq.ParquetWriter(yol, tablo.schema, compression='zstd')
+                yazici.write_table(tablo)
+        finally:
+            if yazici: yazici.close()
+        if yazici is None: pq.write_table(pa.table({}), yol)
+    return yol
@@ -1,19 +1,21 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import io
-import threading
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import time
 import os
 import hashlib
 import psycopg2
-from sqlalchemy import create_engine
 from contextlib import contextmanager
 import numpy as np
 import plotly.express as px
+if int(pd.__version__.split('.')[0]) < 3: pd.set_option("mode.copy_on_write", True)  # sütun seçimi/filtre kopyalamasın (pandas 3'te varsayılan)
+from bildirim import mail_kuyruga_ekle, mail_iscisini_baslat, kutu_durumu
+from zamanlayici import zamanlayiciyi_baslat, standart_gorevler
+from aktarim import AKTARIM_PARTI_SINIRI, DISA_AKTARIM_BICIMLERI, disa_aktar, dosyalari_tampona_al, dosyayi_tampona_al, tampondan_aktar, tamponu_temizle
+from gocler import gocleri_uygula
+from arsiv import ARSIV_DURUMLARI
+from olcum import olc, olculen, span_kaydet, motoru_izle, log_ayarla, span_ozeti, sorgu_ozeti, en_yavas_sorgular, kayitlari_disa_ver, olcumleri_temizle
+from veritabani import havuz_olustur, SAYFA_BOYUTU, TARIH_SUTUNLARI, ONBELLEK_OMRU, kosul_olustur, kosul_ekle, kayit_ara, verileri_getir, arama_sonuclari, dagilim_getir, ozet_getir, ozet_dagilimi, veri_surumunu_artir, onbellek_istatistikleri, veri_surumu, surumlu_sayfa, DEGISIKLIK_YOKLAMA_SN, degisiklikleri_getir, cerceveyi_yamala, bekleyen_sayilari, onay_bekleyenler, toplu_uygula, hata_sonucu_mu, trigram_var_mi
 
 # --- KULLANIM KILAVUZU METNİ ---
 KILAVUZ_METNI = """# 🇹🇷 TSE NUMUNE TAKİP PORTALI - KULLANIM KILAVUZU
@@ -29,6 +31,7 @@ Bu portal, TSE numune takip süreçlerini dijitalleştirmek için tasarlanmışt
 """
 
 st.set_page_config(page_title="TSE NUMUNE TAKİP PORTALI", layout="wide")
+_rerun_t0 = time.perf_counter()
 
 # --- AYARLAR VE GÜVENLİK ---
 try:
@@ -46,158 +49,89 @@ def sifreyi_hashle(sifre_metni):
     return hashlib.sha256(sifre_metni.encode('utf-8')).hexdigest()
 
 # --- VERİTABANI MOTORU ---
-engine = create_engine(DB_URI)
+@st.cache_resource
+def motoru_hazirla():
+    # SQL süreleri ve satır sayıları Admin > Performans sekmesi için halka tampona yazılır
+    return motoru_izle(havuz_olustur(DB_URI, havuz_boyutu=int(st.secrets.get("DB_HAVUZ_BOYUTU", 5)), ek_baglanti=int(st.secrets.get("DB_EK_BAGLANTI", 10)),
+                                     sorgu_zaman_asimi_ms=int(st.secrets.get("DB_SORGU_ZAMAN_ASIMI_MS", 30000))))
+
+engine = motoru_hazirla()
+log_ayarla(str(st.secrets.get("OLCUM_LOG", "0")) == "1", yavas_ms=float(st.secrets.get("OLCUM_YAVAS_MS", 0)))
 
 @contextmanager
 def get_db():
-    conn = psycopg2.connect(DB_URI)
+    # Havuzdan ödünç alınır; close() bağlantıyı kapatmaz, geri-alma yapıp havuza iade eder
+    conn = engine.raw_connection()
     try: yield conn
     finally: conn.close()
 
+# Şema göçleri ve ilk yönetici hesabı süreç başına bir kez; rerun'larda DDL/katalog sorgusu yapılmaz
+@st.cache_resource
 def veritabanini_hazirla():
+    gocleri_uygula(engine)
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute('''CREATE TABLE IF NOT EXISTS denetimler (
-            id SERIAL PRIMARY KEY, basvuru_no TEXT, firma_adi TEXT NOT NULL, marka TEXT,
-            arac_kategori TEXT, arac_tipi TEXT NOT NULL, varyant TEXT, versiyon TEXT, ticari_ad TEXT,
-            gtip_no TEXT, birim TEXT, uretim_ulkesi TEXT, arac_sayisi TEXT, sasi_no TEXT UNIQUE, 
-            basvuru_tarihi DATE, secim_tarihi DATE, il TEXT, durum TEXT DEFAULT 'Şasi Bekliyor',
-            notlar TEXT, guncelleme_tarihi TEXT, ekleyen_kullanici TEXT, silme_talebi INTEGER DEFAULT 0, silme_nedeni TEXT)''')
-        
-        cursor.execute('''CREATE TABLE IF NOT EXISTS kullanicilar (
-            id SERIAL PRIMARY KEY, kullanici_adi TEXT UNIQUE NOT NULL, sifre TEXT NOT NULL,
-            rol TEXT NOT NULL, email TEXT, sorumlu_il TEXT, onay_durumu INTEGER DEFAULT 1, excel_yukleme_yetkisi INTEGER DEFAULT 0)''')
-        
-        cursor.execute("SELECT column_name FROM information_schema.columns WHERE table_name='denetimler' AND column_name='uyari_gonderildi'")
-        if not cursor.fetchone():
-            cursor.execute("ALTER TABLE denetimler ADD COLUMN uyari_gonderildi INTEGER DEFAULT 0")
-        
-        conn.commit()
-
         cursor.execute("SELECT COUNT(*) FROM kullanicilar WHERE rol = 'admin'")
         if cursor.fetchone()[0] == 0:
             cursor.execute("INSERT INTO kullanicilar (kullanici_adi, sifre, rol, email, sorumlu_il, onay_durumu, excel_yukleme_yetkisi) VALUES (%s, %s, 'admin', %s, 'Tümü', 1, 1)", ("admin", sifreyi_hashle("admin123"), ADMIN_MAIL))
             conn.commit()
+    return True
 
 veritabanini_hazirla()
 
 # --- BİLDİRİM & EXCEL AKILLI YÜKLEME ---
-def mail_gonder(kime, konu, icerik):
-    msg = MIMEMultipart()
-    msg['From'], msg['To'], msg['Subject'] = GONDERICI_MAIL, kime, konu
-    msg.attach(MIMEText(f"<html><body><h3>TSE Bildirim</h3><p>{icerik}</p></body></html>", 'html'))
-    try:
-        server = smtplib.SMTP_SSL(SMTP_SUNUCU, SMTP_PORT)
-        server.login(GONDERICI_MAIL, GONDERICI_SIFRE)
-        server.send_message(msg); server.quit()
-    except: pass
-
-def excel_kaydet_ve_mail_at(df_yeni, atlanan_sayi):
-    df_yeni = df_yeni.replace({np.nan: None})
-    df_yeni.to_sql('denetimler', engine, if_exists='append', index=False)
-    
-    try:
-        with get_db() as conn:
-            il_ozeti = df_yeni['il'].value_counts().to_dict()
-            cursor = conn.cursor()
-            for il_adi, adet in il_ozeti.items():
-                cursor.execute("SELECT email, kullanici_adi FROM kullanicilar WHERE sorumlu_il=%s AND onay_durumu=1", (il_adi,))
-                for k_mail, k_adi in cursor.fetchall():
-                    if k_mail and "@" in k_mail: 
-                        m_icerik = f"Merhaba <b>{k_adi}</b>,<br>Sorumlu olduğunuz <b>{il_adi}</b> ili için sisteme <b>{adet} adet</b> yeni kayıt yüklenmiştir."
-                        threading.Thread(target=mail_gonder, args=(k_mail, f"TSE Sistemi - {il_adi} İçin Yeni Veri", m_icerik)).start()
-    except: pass
-    st.success(f"Tebrikler! {len(df_yeni)} yeni kayıt başarıyla eklendi. ({atlanan_sayi} mükerrer atlandı.)")
+@st.cache_resource
+def mail_iscisini_hazirla():
+    mail_iscisini_baslat(engine, {'sunucu': SMTP_SUNUCU, 'port': SMTP_PORT, 'kullanici': GONDERICI_MAIL, 'sifre': GONDERICI_SIFRE})
+    return True
+
+mail_iscisini_hazirla()
+
+def excel_kaydet_ve_mail_at(aktarim_id, atlanan_sayi):
+    # İl sorumlularına bildirimler tampondan_aktar içinde, kayıtlarla aynı transaction'da kuyruğa girer
+    sonuc = tampondan_aktar(engine, aktarim_id)
+    veri_surumunu_artir()
+    st.success(f"Tebrikler! {sonuc['eklenen']} yeni kayıt başarıyla eklendi. ({atlanan_sayi} mükerrer başvuru atlandı.)")
+    if sonuc['mukerrer_sasi'] or sonuc['eksik_alan']:
+        st.warning(f"Reddedilen satırlar: {sonuc['mukerrer_sasi']} şasisi zaten kayıtlı, {sonuc['eksik_alan']} firma/tip bilgisi eksik.")
     time.sleep(2); st.rerun()
 
 # --- 3 GÜN GECİKME OTOMASYONU ---
-def geciken_islemleri_kontrol_et_ve_bildir():
-    try:
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, basvuru_no, il, secim_tarihi, firma_adi FROM denetimler WHERE durum = 'Şasi Bekliyor' AND uyari_gonderildi = 0")
-            bekleyenler = cursor.fetchall()
-            
-            gecikenler = []
-            geciken_id_listesi = []
-            bugun = pd.to_datetime(datetime.now().strftime("%Y-%m-%d"))
-            
-            for satir in bekleyenler:
-                k_id, b_no, k_il, s_tarihi, f_adi = satir
-                if s_tarihi:
-                    s_tarihi_dt = pd.to_datetime(s_tarihi)
-                    fark = (bugun - s_tarihi_dt).days
-                    if fark >= 3: 
-                        gecikenler.append(f"📍 <b>İl:</b> {k_il} | 📄 <b>Başvuru:</b> {b_no} | 🏢 <b>Firma:</b> {f_adi} <i>({fark} gündür bekliyor)</i>")
-                        geciken_id_listesi.append(k_id)
-            
-            if gecikenler:
-                icerik = "Sayın Yönetici,<br><br>Aşağıdaki başvurular sisteme eklenmelerinin üzerinden <b>3 günden fazla</b> zaman geçmesine rağmen hala <b>'Şasi Bekliyor'</b> durumundadır ve işlem yapılmamıştır:<br><br>"
-                icerik += "<br>".join(gecikenler)
-                icerik += "<br><br>Lütfen ilgili illerin uzmanları ile iletişime geçerek süreci hızlandırınız."
-                
-                for g_id in geciken_id_listesi:
-                    cursor.execute("UPDATE denetimler SET uyari_gonderildi = 1 WHERE id = %s", (g_id,))
-                conn.commit()
-                
-                threading.Thread(target=mail_gonder, args=(ADMIN_MAIL, "🚨 Geciken Şasi Atamaları (3+ Gün)", icerik)).start()
-    except Exception:
-        pass 
-
-@st.cache_data(ttl=3600)
-def periyodik_kontrol():
-    geciken_islemleri_kontrol_et_ve_bildir()
+# Kontrol sayfa trafiğinden bağımsız, süreç içi zamanlayıcıda çalışır.
+# ZAMANLAYICI = "harici" ise `python zamanlayici.py` ayrı bir servis olarak çalıştırılmalıdır.
+@st.cache_resource
+def zamanlayiciyi_hazirla():
+    if st.secrets.get("ZAMANLAYICI", "uygulama") != "harici":
+        zamanlayiciyi_baslat(standart_gorevler(engine, ADMIN_MAIL, st.secrets.get("ARSIV_KLASORU")))
     return True
 
-periyodik_kontrol()
-
-def akilli_sutun_eslestir(df_columns):
-    yeni = {}
-    for col in df_columns:
-        tc = str(col).lower().replace(" ", "").replace("_", "").replace(".", "").replace("ş", "s").replace("ı", "i").replace("ğ", "g").replace("ü", "u").replace("ç", "c").replace("ö", "o")
-        if "basvuru" in tc: yeni[col] = "basvuru_no"
-        elif "firma" in tc or "kurum" in tc: yeni[col] = "firma_adi"
-        elif "marka" in tc: yeni[col] = "marka"
-        elif "kategori" in tc: yeni[col] = "arac_kategori"
-        elif "gtip" in tc: yeni[col] = "gtip_no"  # DÜZELTME: GTİP KONTROLÜ TİP'TEN ÖNCE YAPILMALI!
-        elif "tip" in tc: yeni[col] = "arac_tipi" 
-        elif "varyant" in tc or "variant" in tc: yeni[col] = "varyant"
-        elif "versiyon" in tc or "version" in tc: yeni[col] = "versiyon"
-        elif "ticari" in tc: yeni[col] = "ticari_ad"
-        elif "birim" in tc or "sube" in tc or "hizmet" in tc: yeni[col] = "birim"
-        elif "ulke" in tc: yeni[col] = "uretim_ulkesi"
-        elif "sayi" in tc or "adet" in tc: yeni[col] = "arac_sayisi"
-        elif "sasi" in tc or "vin" in tc: yeni[col] = "sasi_no"
-        else: yeni[col] = col 
-    return yeni
-
-# --- VERİ ÇEKME VE İŞLEME ---
-def verileri_getir():
-    try:
-        df = pd.read_sql_query("SELECT * FROM denetimler ORDER BY id DESC", engine)
-        if not df.empty:
-            df['secim_tarihi_dt'] = pd.to_datetime(df['secim_tarihi'], errors='coerce')
-            bugun = pd.to_datetime(datetime.now().strftime("%Y-%m-%d"))
-            df['Geçen Gün'] = (bugun - df['secim_tarihi_dt']).dt.days.apply(lambda x: str(int(x)) if pd.notnull(x) else '-')
-            df['secim_tarihi'] = df['secim_tarihi_dt'].dt.strftime('%Y-%m-%d').fillna('-')
-            for c in df.columns: 
-                if c not in ['Geçen Gün', 'secim_tarihi_dt']: df[c] = df[c].fillna('-')
-        return df
-    except: return pd.DataFrame()
+zamanlayiciyi_hazirla()
 
 # --- RENKLENDİRME FONKSİYONU ---
-def satir_boya(row): 
-    if row['durum'] == 'Testte': 
-        return ['background-color: rgba(255, 193, 7, 0.3)'] * len(row)
-    elif row['durum'] == 'Tamamlandı - Olumlu': 
-        return ['background-color: rgba(40, 167, 69, 0.3)'] * len(row)
-    elif row['durum'] == 'Tamamlandı - Olumsuz': 
-        return ['background-color: rgba(220, 53, 69, 0.3)'] * len(row)
-    return [''] * len(row)
+DURUM_RENKLERI = {
+    'Testte': 'background-color: rgba(255, 193, 7, 0.3)',
+    'Tamamlandı - Olumlu': 'background-color: rgba(40, 167, 69, 0.3)',
+    'Tamamlandı - Olumsuz': 'background-color: rgba(220, 53, 69, 0.3)',
+}
+
+def durum_renklendir(tablo_df):
+    # CSS her durum değeri için bir kez eşlenir, numpy ile tüm sütunlara yayılır (satır başına Python çağrısı yok)
+    renk = tablo_df['durum'].astype(object).map(DURUM_RENKLERI).fillna('').to_numpy()
+    return pd.DataFrame(np.broadcast_to(renk[:, None], tablo_df.shape), index=tablo_df.index, columns=tablo_df.columns)
+
+@olculen()
+def tabloyu_goster(tablo_df):
+    if hata_sonucu_mu(tablo_df): st.warning("⚠️ Kayıtlar şu anda yüklenemedi, lütfen biraz sonra tekrar deneyin.")
+    if tablo_df.empty: st.dataframe(tablo_df, use_container_width=True, height=400)
+    else:
+        # Boş hücreler ve tarih biçimi yalnızca gösterimde uygulanır; çerçeve tipli kalır
+        stil = tablo_df.style.apply(durum_renklendir, axis=None).format(na_rep='-')
+        stil = stil.format('{:%Y-%m-%d}', subset=[c for c in TARIH_SUTUNLARI if c in tablo_df.columns], na_rep='-')
+        st.dataframe(stil, use_container_width=True, height=400)
 
 # --- OTURUM YÖNETİMİ ---
 if 'giris_yapildi' not in st.session_state:
-    st.session_state.update({'giris_yapildi': False, 'kullanici_adi': "", 'rol': "", 'sorumlu_il': "", 'excel_yetkisi': 0, 'ob_df': None, 'atlanmis': 0})
+    st.session_state.update({'giris_yapildi': False, 'kullanici_adi': "", 'rol': "", 'sorumlu_il': "", 'excel_yetkisi': 0, 'ob_aktarim': None, 'atlanmis': 0})
 
 def durum_guncelle(kid, sasi, durum, notlar, starih="MEVCUT", silme=False, snedeni=""):
     g_ani = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -206,8 +140,9 @@ def durum_guncelle(kid, sasi, durum, notlar, starih="MEVCUT", silme=False, snede
         c = conn.cursor()
         if starih == "MEVCUT": c.execute('UPDATE denetimler SET sasi_no=%s, durum=%s, notlar=%s, guncelleme_tarihi=%s, silme_talebi=%s, silme_nedeni=%s WHERE id=%s', (sasi, durum, notlar, g_ani, sil_v, snedeni, int(kid)))
         else: c.execute('UPDATE denetimler SET sasi_no=%s, durum=%s, secim_tarihi=%s, notlar=%s, guncelleme_tarihi=%s, silme_talebi=%s, silme_nedeni=%s WHERE id=%s', (sasi, durum, starih, notlar, g_ani, sil_v, snedeni, int(kid)))
+        if silme: mail_kuyruga_ekle(c, ADMIN_MAIL, "⚠️ YENİ SİLME TALEBİ", f"{sasi} için silme talebi var.")
         conn.commit()
-    if silme: threading.Thread(target=mail_gonder, args=(ADMIN_MAIL, "⚠️ YENİ SİLME TALEBİ", f"{sasi} için silme talebi var.")).start()
+    veri_surumunu_artir()
 
 # --- MİNİMAL GİRİŞ EKRANI ---
 if not st.session_state.giris_yapildi:
@@ -246,18 +181,15 @@ if not st.session_state.giris_yapildi:
                         with get_db() as conn:
                             conn.cursor().execute("INSERT INTO kullanicilar (kullanici_adi, sifre, rol, email, sorumlu_il, onay_durumu, excel_yukleme_yetkisi) VALUES (%s, %s, 'kullanici', %s, %s, 0, 0)", (yk, sifreyi_hashle(ys), ye, yil))
                             conn.commit()
+                        veri_surumunu_artir()
                         st.success("Talebiniz iletildi."); time.sleep(1); st.rerun()
                     except: st.error("Kullanıcı adı mevcut.")
     st.stop()
 
 # --- ANA EKRAN YÜKLENİYOR ---
-df = verileri_getir()
-with get_db() as conn:
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM kullanicilar WHERE onay_durumu = 0")
-    b_onay = c.fetchone()[0]
-    c.execute("SELECT COUNT(*) FROM denetimler WHERE silme_talebi = 1")
-    b_silme = c.fetchone()[0]
+# Bekleyen iş sayıları yalnızca admin sekme başlığında kullanılır
+if st.session_state.rol == "admin":
+    with olc("kenar_sayaclari"): bekleyen = bekleyen_sayilari(engine)
 
 with st.sidebar:
     if os.path.exists("tse_logo.png"): st.image("tse_logo.png", use_container_width=True)
@@ -268,106 +200,206 @@ with st.sidebar:
     if st.button("🚪 Çıkış", use_container_width=True): st.session_state.clear(); st.rerun()
 
 mtabs = ["📊 Ana Tablo", "🛠️ İşlem Paneli", "📥 Veri Girişi", "👤 Profilim"]
-if st.session_state.rol == "admin": mtabs.append(f"👑 Admin ({b_onay+b_silme})")
+if st.session_state.rol == "admin": mtabs.append(f"👑 Admin ({bekleyen['onay'] + bekleyen['silme']})")
 t = st.tabs(mtabs)
 
+# --- TABLO SÜTUN DÜZENİ ---
+def tabloyu_duzenle(tablo_df):
+    # TABLODA TÜM SÜTUNLARI GÖSTERECEK ŞEKİLDE DÜZENLENDİ
+    istenen = [
+        'basvuru_no', 'sasi_no', 'durum', 'secim_tarihi', 'Geçen Gün', 'marka', 
+        'arac_kategori', 'arac_tipi', 'varyant', 'versiyon', 'ticari_ad', 'gtip_no', 
+        'uretim_ulkesi', 'arac_sayisi', 'firma_adi', 'il'
+    ]
+    return tablo_df[[c for c in istenen if c in tablo_df.columns] + [c for c in tablo_df.columns if c not in istenen and c not in ['silme_talebi', 'uyari_gonderildi', 'arama_metni', 'kimlik_anahtari', 'degisiklik_no', 'degisiklik_xid']]]
+
+# --- SAYFA ÖNBELLEĞİ (değişiklik akışıyla yamalanır) ---
+# Oturum gösterdiği sayfayı ve o sayfanın sürümünü (pg_snapshot) tutar. Süreç içi veri sürümü değişmediyse
+# delta en fazla DEGISIKLIK_YOKLAMA_SN'de bir sorulur (boşta rerun DB'ye gitmez); sonra yalnızca o sürümden
+# sonra değişen/silinen satırlar çekilir. Süre dolunca ya da Yenile'de tam yükleme.
+def sayfayi_getir(kosul, son_id, boyut, yenile=False):
+    anahtar = repr((kosul, son_id, boyut))
+    ob = st.session_state.get('sayfa_onbellegi')
+    simdi, v_surum = time.monotonic(), veri_surumu()
+    if not yenile and ob and ob['anahtar'] == anahtar and simdi - ob['zaman'] < ONBELLEK_OMRU:
+        if ob['veri_surumu'] == v_surum and simdi - ob['yoklama'] < DEGISIKLIK_YOKLAMA_SN: return ob['df']
+        delta = degisiklikleri_getir(engine, kosul, ob['surum'])
+        if delta is not None:
+            degisen, silinen, yeni_surum = delta
+            ob.update(veri_surumu=v_surum, yoklama=simdi)
+            if degisen.empty and not silinen: ob['surum'] = yeni_surum; return ob['df']
+            # Dolu sayfada alt sınır en küçük id'dir; satır eksilirse sonraki sayfadan kayma gerekir -> tam yükleme
+            alt_id = int(ob['df']['id'].min()) if ob['dolu'] else None
+            df = cerceveyi_yamala(ob['df'], degisen, silinen, alt_id=alt_id, ust_id=son_id).head(boyut + 1)
+            if not ob['dolu'] or len(df) > boyut:
+                ob.update(df=df, surum=yeni_surum, dolu=len(df) > boyut); return df
+    # Tam yükleme paylaşılan önbellekten (Yenile hariç); sürüm sayfayla birlikte saklandığı için güvenli
+    surum, df = (surumlu_sayfa.__wrapped__ if yenile else surumlu_sayfa)(engine, kosul, son_id=son_id, limit=boyut + 1)
+    if 'id' in df.columns:
+        st.session_state.sayfa_onbellegi = {'anahtar': anahtar, 'zaman': simdi, 'surum': surum, 'df': df, 'dolu': len(df) > boyut,
+                                            'veri_surumu': v_surum, 'yoklama': simdi}
+    return df
+
 # --- SEKME 1: ANALİTİK DASHBOARD VE TABLO ---
-with t[0]:
-    if not df.empty:
-        g_df = df if st.session_state.rol == "admin" else df[df['il'] == st.session_state.sorumlu_il]
-        
-        with st.expander("🔎 Gelişmiş Filtreleme (Daralt)"):
-            f1, f2, f3 = st.columns(3)
-            sec_durum = f1.multiselect("Duruma Göre:", g_df['durum'].unique())
-            sec_il = f2.multiselect("İle Göre:", g_df['il'].unique()) if st.session_state.rol == "admin" else [st.session_state.sorumlu_il]
-            kelime = f3.text_input("Kelime Arama (Marka, Şasi vb.):")
-            
-            if sec_durum: g_df = g_df[g_df['durum'].isin(sec_durum)]
-            if sec_il and st.session_state.rol == "admin": g_df = g_df[g_df['il'].isin(sec_il)]
-            if kelime: g_df = g_df[g_df.apply(lambda r: kelime.lower() in r.astype(str).str.lower().values, axis=1)]
+with t[0], olc("sekme.ana_tablo"):
+    kapsam = kosul_olustur(st.session_state.rol, st.session_state.sorumlu_il)
+    # Metrikler, grafikler ve filtre seçenekleri önceden toplanmış özet tablodan gelir
+    kapsam_ozet = ozet_getir(engine, kapsam)
+    # Filtreler ve arşiv anahtarı her zaman gösterilir: kayıtları tümüyle arşivlenmiş bir il de arşivine ulaşabilmeli
+    with st.expander("🔎 Gelişmiş Filtreleme (Daralt)"):
+        # Tamamlanıp arşive taşınan kayıtlar yalnızca bu mod açıkken sorgulanır (sıcak + arşiv görünümü)
+        arsiv_dahil = st.toggle("🗄️ Arşivi dahil et (geçmiş kayıtlar)")
+        f1, f2, f3 = st.columns(3)
+        sec_durum = f1.multiselect("Duruma Göre:", sorted(set(kapsam_ozet['durum']) - {'-'} | (set(ARSIV_DURUMLARI) if arsiv_dahil else set())))
+        arsiv_iller = dagilim_getir(engine, kapsam, 'il', tablo='denetimler_arsiv') if arsiv_dahil else None
+        il_secenekleri = set(kapsam_ozet['il']) | (set(arsiv_iller['il'].dropna()) if arsiv_dahil else set())
+        sec_il = f2.multiselect("İle Göre:", sorted(il_secenekleri - {'-'})) if st.session_state.rol == "admin" else [st.session_state.sorumlu_il]
+        kelime = f3.text_input("Kelime Arama (Marka, Şasi vb.):")
+
+    # Filtreler SQL'e iner; sadece kullanıcının görebileceği satırlar çekilir
+    kosul = kosul_olustur(st.session_state.rol, st.session_state.sorumlu_il, durumlar=sec_durum, iller=sec_il if st.session_state.rol == "admin" else (), kelime=kelime)
+    tablo = 'denetimler_tumu' if arsiv_dahil else 'denetimler'
+    aramada = bool(kelime and kelime.strip())
+    # Boşluk seçilen kaynağa göre: sıcak özet boşsa arşiv modunda arşivdeki il dağılımına da bakılır
+    kayit_yok = kapsam_ozet.empty and (not arsiv_dahil or arsiv_iller.empty)
+    if kayit_yok: st.info("Sistemde kayıt yok." if arsiv_dahil else "Sistemde güncel kayıt yok. Geçmiş kayıtlar için filtrelerden 'Arşivi dahil et'i açın.")
+    else:
+        if aramada or arsiv_dahil:
+            # Özet tablo yalnızca sıcak kayıtları sayar; arama ve arşiv modunda dağılımlar canlı sorgudan
+            ozet_df = None
+            durum_df = dagilim_getir(engine, kosul, 'durum', tablo=tablo)
+        else:
+            ozet_df = kapsam_ozet
+            if sec_durum: ozet_df = ozet_df[ozet_df['durum'].isin(sec_durum)]
+            if sec_il and st.session_state.rol == "admin": ozet_df = ozet_df[ozet_df['il'].isin(sec_il)]
+            durum_df = ozet_dagilimi(ozet_df, 'durum')
+        d_adet = dict(zip(durum_df['durum'], durum_df['count']))
 
         c_m1, c_m2, c_m3 = st.columns(3)
-        c_m1.metric("Toplam Listelenen", len(g_df))
-        c_m2.metric("Testte", len(g_df[g_df['durum'] == 'Testte']))
-        c_m3.metric("Olumlu", len(g_df[g_df['durum'] == 'Tamamlandı - Olumlu']))
-
-        if len(g_df) > 0:
-            gc1, gc2 = st.columns(2)
-            with gc1:
-                fig1 = px.pie(g_df, names='durum', title='Durum Dağılımı', hole=0.3)
-                st.plotly_chart(fig1, use_container_width=True)
-            with gc2:
-                if st.session_state.rol == "admin":
-                    fig2 = px.bar(g_df['il'].value_counts().reset_index(), x='il', y='count', title='İllere Göre Dağılım', color='il')
-                else:
-                    fig2 = px.bar(g_df['marka'].value_counts().reset_index().head(10), x='marka', y='count', title='En Çok İşlem Yapılan Markalar', color='marka')
-                st.plotly_chart(fig2, use_container_width=True)
-
-        # TABLODA TÜM SÜTUNLARI GÖSTERECEK ŞEKİLDE DÜZENLENDİ
-        istenen = [
-            'basvuru_no', 'sasi_no', 'durum', 'secim_tarihi', 'Geçen Gün', 'marka', 
-            'arac_kategori', 'arac_tipi', 'varyant', 'versiyon', 'ticari_ad', 'gtip_no', 
-            'uretim_ulkesi', 'arac_sayisi', 'firma_adi', 'il'
-        ]
-        goster_df = g_df[[c for c in istenen if c in g_df.columns] + [c for c in g_df.columns if c not in istenen and c not in ['secim_tarihi_dt', 'silme_talebi', 'uyari_gonderildi']]]
-        
-        st.dataframe(goster_df.style.apply(satir_boya, axis=1), use_container_width=True, height=400)
+        c_m1.metric("Toplam Listelenen", int(durum_df['count'].sum()))
+        c_m2.metric("Testte", int(d_adet.get('Testte', 0)))
+        c_m3.metric("Olumlu", int(d_adet.get('Tamamlandı - Olumlu', 0)))
+
+        if not durum_df.empty:
+            with olc("ana_tablo.grafikler"):
+                gc1, gc2 = st.columns(2)
+                with gc1:
+                    fig1 = px.pie(durum_df, names='durum', values='count', title='Durum Dağılımı', hole=0.3)
+                    st.plotly_chart(fig1, use_container_width=True)
+                with gc2:
+                    if st.session_state.rol == "admin":
+                        il_df = dagilim_getir(engine, kosul, 'il', tablo=tablo) if ozet_df is None else ozet_dagilimi(ozet_df, 'il')
+                        fig2 = px.bar(il_df, x='il', y='count', title='İllere Göre Dağılım', color='il')
+                    else:
+                        marka_df = dagilim_getir(engine, kosul, 'marka', limit=10, tablo=tablo) if ozet_df is None else ozet_dagilimi(ozet_df, 'marka', limit=10)
+                        fig2 = px.bar(marka_df, x='marka', y='count', title='En Çok İşlem Yapılan Markalar', color='marka')
+                    st.plotly_chart(fig2, use_container_width=True)
+
+        if aramada:
+            # Arama modunda sunucu tarafında puanlanmış en iyi eşleşmeler gösterilir
+            sayfa_df = arama_sonuclari(engine, kosul, tablo=tablo)
+            goster_df = tabloyu_duzenle(sayfa_df) if not sayfa_df.empty else sayfa_df
+            tabloyu_goster(goster_df)
+            st.caption(f"En iyi {SAYFA_BOYUTU} eşleşme, " + ("benzerliğe göre sıralı." if trigram_var_mi(engine) else "ifadenin tamamını içerenler önce, yeniden eskiye."))
+        else:
+            # KEYSET SAYFALAMA: her sayfanın başlangıç imleci (son görülen id) saklanır;
+            # tabloya ve renklendirmeye yalnızca o anki pencere gider
+            boyut = st.session_state.get('sayfa_boyutu', SAYFA_BOYUTU)
+            if st.session_state.get('sayfa_anahtari') != repr((kosul, boyut, tablo)):
+                st.session_state.update({'sayfa_anahtari': repr((kosul, boyut, tablo)), 'sayfa_imleri': [None]})
+            imler = st.session_state.sayfa_imleri
+            yenile = st.session_state.pop('sayfa_yenile', False)
+            if arsiv_dahil: sayfa_df = (verileri_getir.__wrapped__ if yenile else verileri_getir)(engine, kosul, son_id=imler[-1], limit=boyut + 1, tablo=tablo)
+            else: sayfa_df = sayfayi_getir(kosul, imler[-1], boyut, yenile=yenile)
+            sonraki_var = len(sayfa_df) > boyut
+            goster_df = tabloyu_duzenle(sayfa_df.head(boyut)) if not sayfa_df.empty else sayfa_df
+            
+            tabloyu_goster(goster_df)
+            
+            p1, p2, p3, p4, p5 = st.columns([1, 2, 1, 1, 1])
+            if p1.button("◀ Önceki", disabled=len(imler) == 1): imler.pop(); st.rerun()
+            p2.caption(f"Sayfa {len(imler)} · sayfa başına {boyut} kayıt")
+            p3.selectbox("Sayfa boyutu", [50, 100, 200, 500], index=[50, 100, 200, 500].index(boyut), key='sayfa_boyutu', label_visibility="collapsed")
+            if p4.button("Sonraki ▶", disabled=not sonraki_var): imler.append(int(sayfa_df['id'].iloc[boyut - 1])); st.rerun()
+            if p5.button("🔄 Yenile"): st.session_state.sayfa_yenile = True; st.rerun()
         
-        b = io.BytesIO(); goster_df.to_excel(b, index=False)
-        st.download_button("📥 Tabloyu Excel Olarak İndir", b.getvalue(), "Rapor.xlsx")
-    else: st.info("Sistemde kayıt yok.")
+        # DIŞA AKTARIM: dosya sadece istenince, DB imlecinden akışlı olarak üretilir. İndirme butonu yalnızca
+        # hazırlandığı çalıştırmada çizilir (tıklama rerun tetiklemez); dosya buton verisi alınınca silinir,
+        # yarıda kalanları zamanlayıcı temizler
+        e1, e2, e3 = st.columns([1, 1, 2])
+        bicim = e1.selectbox("Biçim", list(DISA_AKTARIM_BICIMLERI), label_visibility="collapsed")
+        if e2.button("📦 Dışa Aktarımı Hazırla"):
+            with st.spinner("Rapor hazırlanıyor..."):
+                yol = disa_aktar(engine, kosul, bicim, duzenle=tabloyu_duzenle, tablo=tablo)
+            try:
+                with open(yol, 'rb') as f: veri = f.read()
+            finally: os.remove(yol)
+            uzanti, mime = DISA_AKTARIM_BICIMLERI[bicim]
+            e3.download_button(f"📥 Tabloyu {bicim} Olarak İndir", veri, f"Rapor.{uzanti}", mime, on_click="ignore")
 
 # --- SEKME 2: İŞLEM PANELİ ---
-with t[1]:
-    i_df = df if st.session_state.rol == "admin" else df[(df['il'] == st.session_state.sorumlu_il) | (df['ekleyen_kullanici'] == st.session_state.kullanici_adi)]
+with t[1], olc("sekme.islem_paneli"):
+    # Seçim kutuları tüm başvuruları değil, yazılan öneke göre sunucudan gelen ilk eşleşmeleri listeler
+    i_kapsam = kosul_olustur(st.session_state.rol, st.session_state.sorumlu_il, kullanici_adi=st.session_state.kullanici_adi)
+    def secenek_listesi(adaylar, *alanlar):
+        return (adaylar['id'].astype(str) + " | " + adaylar[alanlar[0]].astype(str) + "".join(" - " + adaylar[a].astype(str) for a in alanlar[1:])).tolist()
     p_id = st.session_state.get('o_id')
     
     if p_id:
         st.warning("⚠️ Çift Kayıt Riski! Yinede kaydetmek istiyor musunuz?")
         ce, ch = st.columns(2)
         if ce.button("✅ Devam"): 
-            durum_guncelle(p_id, st.session_state.o_no, 'Testte', "", starih=datetime.now().strftime("%Y-%m-%d"))
-            st.session_state.update({'o_id': None, 'o_no': None}); st.rerun()
+            try:
+                durum_guncelle(p_id, st.session_state.o_no, 'Testte', "", starih=datetime.now().strftime("%Y-%m-%d"))
+                st.session_state.update({'o_id': None, 'o_no': None}); st.rerun()
+            except psycopg2.IntegrityError: st.session_state.update({'o_id': None, 'o_no': None}); st.error("Şasi mevcut!")
         if ch.button("❌ İptal"): st.session_state.update({'o_id': None, 'o_no': None}); st.rerun()
     else:
         cl, cr = st.columns(2)
         with cl:
             st.markdown("#### 🆕 Şasi Atama")
-            if not i_df.empty:
-                b_list = i_df[i_df['durum'] == 'Şasi Bekliyor']
-                sel = st.selectbox("Başvuru:", options=(b_list['id'].astype(str) + " | " + b_list['basvuru_no'].astype(str)).tolist(), index=None) if not b_list.empty else None
-                if sel:
-                    sid = int(sel.split(" |")[0]); rm = b_list[b_list['id'] == sid].iloc[0]
-                    vin = st.text_input("VIN Numarası")
-                    if st.button("Kaydet ve Gönder") and vin:
-                        try:
-                            with get_db() as conn:
-                                cur = conn.cursor()
-                                cur.execute('SELECT id FROM denetimler WHERE firma_adi=%s AND marka=%s AND arac_tipi=%s AND id != %s', (rm['firma_adi'], rm['marka'], rm['arac_tipi'], sid))
-                                if cur.fetchone(): st.session_state.update({'o_id': sid, 'o_no': vin}); st.rerun()
-                                else: durum_guncelle(sid, vin, 'Testte', "", starih=datetime.now().strftime("%Y-%m-%d")); st.rerun()
-                        except: st.error("Şasi mevcut!")
+            q_bas = st.text_input("Başvuru No Ara:", key="ara_bekleyen", placeholder="Başvuru numarasının başını yazın")
+            b_list = kayit_ara(engine, kosul_ekle(i_kapsam, "durum = 'Şasi Bekliyor'"), 'basvuru_no', q_bas)
+            sel = st.selectbox("Başvuru:", options=secenek_listesi(b_list, 'basvuru_no'), index=None) if not b_list.empty else None
+            if b_list.empty: st.caption("Eşleşen bekleyen başvuru yok.")
+            if sel:
+                sid = int(sel.split(" |")[0])
+                vin = st.text_input("VIN Numarası")
+                if st.button("Kaydet ve Gönder") and vin:
+                    try:
+                        with get_db() as conn:
+                            cur = conn.cursor()
+                            cur.execute('SELECT id FROM denetimler_tumu WHERE kimlik_anahtari = (SELECT kimlik_anahtari FROM denetimler WHERE id=%s) AND id != %s LIMIT 1', (sid, sid))
+                            if cur.fetchone(): st.session_state.update({'o_id': sid, 'o_no': vin}); st.rerun()
+                            else: durum_guncelle(sid, vin, 'Testte', "", starih=datetime.now().strftime("%Y-%m-%d")); st.rerun()
+                    except: st.error("Şasi mevcut!")
         with cr:
             st.markdown("#### 🔍 İşlem & İlave Şasi")
             tab_guncelle, tab_ilave = st.tabs(["🔄 Durum Güncelle", "➕ İlave Şasi Ekle"])
             
             with tab_guncelle:
-                if not i_df.empty:
-                    ilist = i_df[i_df['durum'] != 'Şasi Bekliyor']
-                    sr = st.selectbox("Şasi/Firma Ara:", options=(ilist['id'].astype(str) + " | " + ilist['sasi_no'].astype(str)).tolist(), index=None) if not ilist.empty else None
-                    if sr:
-                        sid = int(sr.split(" |")[0]); cu = ilist[ilist['id'] == sid].iloc[0]
-                        with st.form("upd"):
-                            nd = st.selectbox("Yeni Durum", ["Testte", "Tamamlandı - Olumlu", "Tamamlandı - Olumsuz"])
-                            sl = st.checkbox("Silme Talebi")
-                            if st.form_submit_button("Güncelle"): durum_guncelle(sid, cu['sasi_no'], nd, "", silme=sl, snedeni="Talep"); st.rerun()
+                q_sasi = st.text_input("Şasi No Ara:", key="ara_sasi", placeholder="Şasi numarasının başını yazın")
+                ilist = kayit_ara(engine, kosul_ekle(i_kapsam, "durum <> 'Şasi Bekliyor'"), 'sasi_no', q_sasi)
+                sr = st.selectbox("Şasi/Firma Ara:", options=secenek_listesi(ilist, 'sasi_no', 'firma_adi'), index=None) if not ilist.empty else None
+                if sr:
+                    sid = int(sr.split(" |")[0]); cu = ilist[ilist['id'] == sid].iloc[0]
+                    with st.form("upd"):
+                        nd = st.selectbox("Yeni Durum", ["Testte", "Tamamlandı - Olumlu", "Tamamlandı - Olumsuz"])
+                        sl = st.checkbox("Silme Talebi")
+                        if st.form_submit_button("Güncelle"): durum_guncelle(sid, cu['sasi_no'], nd, "", silme=sl, snedeni="Talep"); st.rerun()
 
             with tab_ilave:
                 st.info("Mevcut bir başvuruyu kopyalayarak ilave şasi ekler.")
-                if not i_df.empty:
-                    sr_add = st.selectbox("Kopyalanacak Başvuru:", options=(i_df['id'].astype(str) + " | " + i_df['basvuru_no'].astype(str) + " - " + i_df['firma_adi'].astype(str)).tolist(), index=None)
-                    if sr_add:
-                        sid_add = int(sr_add.split(" |")[0]); ref = i_df[i_df['id'] == sid_add].iloc[0]
+                q_kopya = st.text_input("Başvuru No Ara:", key="ara_kopya", placeholder="Başvuru numarasının başını yazın")
+                k_list = kayit_ara(engine, i_kapsam, 'basvuru_no', q_kopya)
+                sr_add = st.selectbox("Kopyalanacak Başvuru:", options=secenek_listesi(k_list, 'basvuru_no', 'firma_adi'), index=None) if not k_list.empty else None
+                if sr_add:
+                    sid_add = int(sr_add.split(" |")[0]); ref_df = verileri_getir(engine, kosul_ekle(i_kapsam, "id = :kid", kid=sid_add))
+                    # Seçim listesi ile bu okuma arasında kayıt silinmiş/arşivlenmiş ya da okuma başarısız olmuş olabilir
+                    if hata_sonucu_mu(ref_df): st.error("Başvuru bilgileri okunamadı, lütfen tekrar deneyin.")
+                    elif ref_df.empty: st.error("Seçilen başvuru artık bulunamadı (silinmiş ya da arşivlenmiş olabilir).")
+                    else:
+                        ref = {k: (None if pd.isna(v) else v) for k, v in ref_df.iloc[0].items()}
                         with st.form("add_sasi_form"):
                             st.write(f"**B.No:** {ref['basvuru_no']} | **Firma:** {ref['firma_adi']} | **Tip:** {ref['arac_tipi']}")
                             ysasi = st.text_input("Yeni Şasi Numarası (VIN)")
@@ -381,19 +413,21 @@ with t[1]:
                                                 VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,'Testte',%s)''', 
                                                 (ref['basvuru_no'], ref['firma_adi'], ref['marka'], ref['arac_kategori'], ref['arac_tipi'], ref['varyant'], ref['versiyon'], ref['ticari_ad'], ref['gtip_no'], ref['birim'], ref['uretim_ulkesi'], ref['arac_sayisi'], ysasi, datetime.now().strftime("%Y-%m-%d"), datetime.now().strftime("%Y-%m-%d"), ref['il'], st.session_state.kullanici_adi))
                                             c.commit()
+                                        veri_surumunu_artir()
                                         st.success("İlave şasi eklendi!"); time.sleep(1); st.rerun()
                                     except psycopg2.IntegrityError:
                                         st.error("Bu şasi mevcut!")
 
 # --- SEKME 3: VERİ GİRİŞİ ---
-with t[2]:
-    if st.session_state.ob_df is not None:
+with t[2], olc("sekme.veri_girisi"):
+    if st.session_state.ob_aktarim is not None:
         st.warning("⚠️ Mükerrer firma/marka çakışması! Yinede ekle?")
         c1, c2 = st.columns(2)
         if c1.button("✅ Ekle"): 
-            excel_kaydet_ve_mail_at(st.session_state.ob_df, st.session_state.atlanmis)
-            st.session_state.update({'ob_df': None, 'atlanmis': 0}); st.rerun()
-        if c2.button("❌ İptal"): st.session_state.update({'ob_df': None, 'atlanmis': 0}); st.rerun()
+            aktarim_id = st.session_state.ob_aktarim
+            st.session_state.update({'ob_aktarim': None})
+            excel_kaydet_ve_mail_at(aktarim_id, st.session_state.atlanmis)
+        if c2.button("❌ İptal"): tamponu_temizle(engine, st.session_state.ob_aktarim); st.session_state.update({'ob_aktarim': None, 'atlanmis': 0}); st.rerun()
     else:
         cf, ce = st.columns(2)
         with cf:
@@ -404,54 +438,51 @@ with t[2]:
                         with get_db() as c:
                             c.cursor().execute("INSERT INTO denetimler (firma_adi, marka, arac_tipi, sasi_no, basvuru_no, secim_tarihi, il, durum) VALUES (%s,%s,%s,%s,%s,%s,%s, 'Testte')", (fa, ma, ti, sn, bn, datetime.now().strftime("%Y-%m-%d"), st.session_state.sorumlu_il))
                             c.commit()
+                        veri_surumunu_artir()
                         st.success("Eklendi."); st.rerun()
                     except: st.error("Şasi mevcut!")
         with ce:
-            up = st.file_uploader("Excel Yükle", type=['xlsx', 'csv'])
-            if up and st.button("Aktar"):
-                if up.name.endswith('.csv'): df_ekle = pd.read_csv(up)
-                else: df_ekle = pd.read_excel(up)
-                
-                df_ekle.rename(columns=akilli_sutun_eslestir(df_ekle.columns), inplace=True)
-                df_ekle = df_ekle.loc[:, ~df_ekle.columns.duplicated()]
-                
-                df_ekle['ekleyen_kullanici'] = st.session_state.kullanici_adi
-                if 'durum' not in df_ekle.columns: df_ekle['durum'] = 'Şasi Bekliyor'
-                if 'il' not in df_ekle.columns: df_ekle['il'] = st.session_state.sorumlu_il
-                if 'basvuru_tarihi' not in df_ekle.columns: df_ekle['basvuru_tarihi'] = datetime.now().strftime("%Y-%m-%d")
-                if 'secim_tarihi' not in df_ekle.columns: df_ekle['secim_tarihi'] = datetime.now().strftime("%Y-%m-%d")
-                
-                gecerli_sutunlar = [
-                    'basvuru_no', 'firma_adi', 'marka', 'arac_kategori', 'arac_tipi', 
-                    'varyant', 'versiyon', 'ticari_ad', 'gtip_no', 'birim', 'uretim_ulkesi', 
-                    'arac_sayisi', 'sasi_no', 'basvuru_tarihi', 'secim_tarihi', 'il', 
-                    'durum', 'notlar', 'ekleyen_kullanici'
-                ]
-                
-                df_ekle = df_ekle[[c for c in df_ekle.columns if c in gecerli_sutunlar]]
-                
-                mevcut_db = pd.read_sql_query("SELECT basvuru_no, firma_adi, marka, arac_tipi FROM denetimler", engine)
-                m_bas_list = mevcut_db['basvuru_no'].astype(str).tolist() if not mevcut_db.empty else []
-                
-                df_yeni = df_ekle[~df_ekle['basvuru_no'].astype(str).isin(m_bas_list)].copy()
-                atlanmis_sayi = len(df_ekle) - len(df_yeni)
-                
-                if len(df_yeni) > 0:
-                    cakisma_var = False
-                    if not mevcut_db.empty:
-                        mevcut_str = (mevcut_db['firma_adi'].astype(str) + mevcut_db['marka'].astype(str) + mevcut_db['arac_tipi'].astype(str)).str.lower().str.replace(" ", "")
-                        yeni_str = (df_yeni['firma_adi'].astype(str) + df_yeni['marka'].astype(str) + df_yeni['arac_tipi'].astype(str)).str.lower().str.replace(" ", "")
-                        cakisma_var = yeni_str.isin(mevcut_str).any()
-                        
-                    if cakisma_var:
-                        st.session_state.update({'ob_df': df_yeni, 'atlanmis': atlanmis_sayi}); st.rerun()
+            dosyalar = st.file_uploader("Excel Yükle", type=['xlsx', 'csv'], accept_multiple_files=True)
+            if st.session_state.get('aktarim_raporu') is not None:
+                st.caption("Son toplu aktarım")
+                st.dataframe(st.session_state.aktarim_raporu, hide_index=True, use_container_width=True)
+            if dosyalar and st.button("Aktar"):
+                # Çoklu partinin toplam boyutu sınırlı: dosyalar işçilere sırayla gider ama yüklemeler bellekte durur
+                if len(dosyalar) > 1 and sum(d.size for d in dosyalar) > AKTARIM_PARTI_SINIRI:
+                    st.error(f"Toplu aktarımda toplam dosya boyutu en fazla {AKTARIM_PARTI_SINIRI // (1024 * 1024)} MB olabilir; dosyaları birkaç partide yükleyin.")
+                else:
+                    bugun = datetime.now().strftime("%Y-%m-%d")
+                    varsayilan = {'durum': 'Şasi Bekliyor', 'il': st.session_state.sorumlu_il, 'basvuru_tarihi': bugun, 'secim_tarihi': bugun}
+                    if len(dosyalar) == 1:
+                        st.session_state.aktarim_raporu = None
+                        with st.spinner("Dosya parça parça aktarılıyor..."):
+                            yukleme = dosyayi_tampona_al(engine, dosyalar[0], dosyalar[0].name, st.session_state.kullanici_adi, varsayilan)
                     else:
-                        excel_kaydet_ve_mail_at(df_yeni, atlanmis_sayi)
-                else: 
-                    st.warning("Yüklediğiniz dosyadaki tüm kayıtlar zaten sistemde mevcut!")
+                        # Çoklu dosya: ayrıştırma süreç havuzunda; biten her dosya için satır ve hız tabloya eklenir
+                        cubuk, tablo_alani, rapor = st.progress(0.0, text="Dosyalar ayrıştırılıyor..."), st.empty(), []
+                        def ilerleme(ozet, biten, toplam):
+                            rapor.append({'Dosya': ozet['dosya'], 'Boyut (KB)': round(ozet['bayt'] / 1024), 'Satır': ozet['satir'],
+                                          'Ayrıştırma (sn)': round(ozet['ayristirma_sn'], 2), 'Yazma (sn)': round(ozet['yazma_sn'], 2),
+                                          'Satır/sn': round(ozet['satir_sn']), 'Hata': ozet['hata'] or ''})
+                            cubuk.progress(biten / toplam, text=f"{biten}/{toplam} dosya işlendi")
+                            tablo_alani.dataframe(pd.DataFrame(rapor), hide_index=True, use_container_width=True)
+                        yukleme = dosyalari_tampona_al(engine, [(d.name, d) for d in dosyalar], st.session_state.kullanici_adi, varsayilan, ilerleme)
+                        st.session_state.aktarim_raporu = pd.DataFrame(rapor)
+
+                    if yukleme['tamponda'] > 0:
+                        if yukleme['cakisma']:
+                            st.session_state.update({'ob_aktarim': yukleme['aktarim_id'], 'atlanmis': yukleme['atlanan']}); st.rerun()
+                        else:
+                            excel_kaydet_ve_mail_at(yukleme['aktarim_id'], yukleme['atlanan'])
+                    elif yukleme['okunan'] == 0 and any(o['hata'] for o in yukleme.get('dosyalar', [])):
+                        st.error("Dosyalar okunamadı; ayrıntılar yukarıdaki tablonun 'Hata' sütununda. Dosya biçimini kontrol edip tekrar deneyin.")
+                    elif yukleme['okunan'] == 0:
+                        st.warning("Yüklenen dosyalarda aktarılacak satır bulunamadı.")
+                    else: 
+                        st.warning("Yüklediğiniz dosyadaki tüm kayıtlar zaten sistemde mevcut!")
 
 # --- SEKME 4: PROFİLİM ---
-with t[3]:
+with t[3], olc("sekme.profil"):
     st.subheader("Güvenlik Ayarları")
     with st.form("profil_form"):
         eski = st.text_input("Mevcut Şifreniz", type="password")
@@ -471,17 +502,44 @@ with t[3]:
 
 # --- SEKME 5: ADMİN (Eğer yetkiliyse) ---
 if st.session_state.rol == "admin":
-    with t[4]:
-        c1, c2 = st.columns(2)
-        with c1:
-            st.markdown("**Onay Bekleyenler**")
-            for _, r in pd.read_sql_query("SELECT * FROM kullanicilar WHERE onay_durumu=0", engine).iterrows():
-                if st.button(f"Onayla: {r['kullanici_adi']}", key=f"o_{r['id']}"):
-                    with get_db() as c: c.cursor().execute("UPDATE kullanicilar SET onay_durumu=1 WHERE id=%s", (r['id'],)); c.commit()
-                    st.rerun()
-        with c2:
-            st.markdown("**Silme Talepleri**")
-            for _, r in df[df['silme_talebi']==1].iterrows():
-                if st.button(f"Kalıcı Sil: {r['sasi_no']}", key=f"s_{r['id']}"):
-                    with get_db() as c: c.cursor().execute("DELETE FROM denetimler WHERE id=%s", (r['id'],)); c.commit()
-                    st.rerun()
+    with t[4], olc("sekme.admin"):
+        at_yonetim, at_performans = st.tabs(["👥 Yönetim", "⏱️ Performans"])
+        with at_yonetim:
+            # Seçilenler tek transaction'da işlenir; her satır için ayrı buton/rerun yok
+            def toplu_secim(baslik, adaylar, etiket, islemler, anahtar):
+                st.markdown(f"**{baslik} ({len(adaylar)})**")
+                if adaylar.empty: st.caption("Bekleyen yok."); return
+                etiketler = dict(zip(adaylar['id'].astype(int), etiket(adaylar)))
+                hepsi = st.checkbox("Tümünü seç", key=f"{anahtar}_hepsi")
+                secilen = st.multiselect("Seçilenler", list(etiketler), default=list(etiketler) if hepsi else [], format_func=etiketler.get, key=f"{anahtar}_{hepsi}")
+                for sutun, (yazi, islem) in zip(st.columns(len(islemler)), islemler):
+                    if sutun.button(f"{yazi} ({len(secilen)})", key=f"{anahtar}_{islem}", disabled=not secilen, use_container_width=True):
+                        adet = toplu_uygula(engine, islem, secilen)
+                        st.toast(f"{adet} kayıt işlendi."); st.rerun()
+            c1, c2 = st.columns(2)
+            with c1:
+                toplu_secim("Onay Bekleyenler", onay_bekleyenler(engine),
+                            lambda d: d['kullanici_adi'] + " - " + d['sorumlu_il'].fillna('-') + " - " + d['email'].fillna('-'),
+                            [("✅ Onayla", 'kullanici_onayla'), ("❌ Reddet", 'kullanici_reddet')], "onay")
+            with c2:
+                toplu_secim("Silme Talepleri", verileri_getir(engine, ("silme_talebi = 1", {}), sira="id"),
+                            lambda d: d['sasi_no'].astype(object).fillna('-') + " - " + d['firma_adi'].astype(object).fillna('-') + " - " + d['silme_nedeni'].astype(object).fillna('-'),
+                            [("🗑️ Kalıcı Sil", 'silme_onayla'), ("↩️ Talebi Reddet", 'silme_reddet')], "silme")
+
+            ob = onbellek_istatistikleri()
+            st.caption(f"🗄️ Sorgu önbelleği: {ob['isabet']} isabet / {ob['iska']} ıska (%{ob['isabet_orani']*100:.0f}) · {ob['kayit']} kayıt · veri sürümü {ob['surum']}")
+            kd = kutu_durumu(engine)
+            st.caption(f"✉️ Mail kutusu: {kd.get('bekliyor', 0)} bekliyor · {kd.get('gonderildi', 0)} gönderildi · {kd.get('hata', 0)} başarısız")
+        with at_performans:
+            # Bu süreçte ölçülen son rerun'lar: bölüm süreleri (span) ve SQL çalıştırmaları
+            st.markdown("**Bölüm Süreleri (p50 / p95)**")
+            st.dataframe(span_ozeti(), use_container_width=True, hide_index=True)
+            st.markdown("**En Yavaş Sorgular**")
+            st.dataframe(en_yavas_sorgular(20), use_container_width=True, hide_index=True)
+            st.markdown("**Sorgu Özeti**")
+            st.dataframe(sorgu_ozeti(), use_container_width=True, hide_index=True)
+            pc1, pc2 = st.columns(2)
+            pc1.download_button("📜 Ölçümleri İndir (JSON Lines)", kayitlari_disa_ver(), "olcumler.jsonl", "application/jsonl", use_container_width=True)
+            if pc2.button("🧹 Ölçümleri Sıfırla", use_container_width=True): olcumleri_temizle(); st.rerun()
+
+span_kaydet("rerun", time.perf_counter() - _rerun_t0)
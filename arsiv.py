@@ -0,0 +1,93 @@
+import os
+import shutil
+from collections import Counter
+from datetime import date, timedelta
+from sqlalchemy import text
+from aktarim import disa_aktar
+from olcum import olculen
+from veritabani import veri_surumunu_artir
+
+# --- ARŞİV (tamamlanmış denetimler) ---
+# Tamamlanmış ve seçim tarihinden ARSIV_GUN geçmiş satırlar, secim_tarihi yılına göre bölümlenmiş
+# denetimler_arsiv tablosuna taşınır. Sıcak tablo ve indeksleri operasyonel kayıtlarla sınırlı kalır;
+# geçmiş sorguları denetimler_tumu görünümü (sıcak + arşiv) üzerinden yapılır.
+# denetimler'e yeni sütun ekleyen göç, ARSIV_SUTUNLARI'nı, arşiv tablosunu ve görünümü de güncellemelidir.
+# (İstisna: değişiklik akışının degisiklik_xid sütunu yalnızca sıcak tabloyu ilgilendirir, arşive taşınmaz.)
+ARSIV_DURUMLARI = ('Tamamlandı - Olumlu', 'Tamamlandı - Olumsuz')
+ARSIV_GUN = 180
+ARSIV_PARTI = 5000
+ARSIV_SUTUNLARI = [
+    'id', 'basvuru_no', 'firma_adi', 'marka', 'arac_kategori', 'arac_tipi', 'varyant', 'versiyon', 'ticari_ad',
+    'gtip_no', 'birim', 'uretim_ulkesi', 'arac_sayisi', 'sasi_no', 'basvuru_tarihi', 'secim_tarihi', 'il', 'durum',
+    'notlar', 'guncelleme_tarihi', 'ekleyen_kullanici', 'silme_talebi', 'silme_nedeni', 'uyari_gonderildi',
+    'arama_metni', 'kimlik_anahtari', 'degisiklik_no',
+]
+_DURUM_LISTESI = ", ".join(f"'{d}'" for d in ARSIV_DURUMLARI)
+_SUTUNLAR = ", ".join(ARSIV_SUTUNLARI)
+
+ARSIV_DDL = [
+    # LIKE üretilmiş sütunları (arama_metni, kimlik_anahtari) düz sütun olarak kopyalar; değerler taşınırken saklanır
+    "CREATE TABLE IF NOT EXISTS denetimler_arsiv (LIKE denetimler, arsivlenme TIMESTAMP NOT NULL DEFAULT now()) PARTITION BY RANGE (secim_tarihi)",
+    "CREATE TABLE IF NOT EXISTS denetimler_arsiv_diger PARTITION OF denetimler_arsiv DEFAULT",
+    "CREATE INDEX IF NOT EXISTS ix_denetimler_arsiv_id ON denetimler_arsiv (id)",
+    "CREATE INDEX IF NOT EXISTS ix_denetimler_arsiv_il_durum_id ON denetimler_arsiv (il, durum, id)",
+    "CREATE INDEX IF NOT EXISTS ix_denetimler_arsiv_sasi ON denetimler_arsiv (sasi_no)",
+    "CREATE INDEX IF NOT EXISTS ix_denetimler_arsiv_basvuru ON denetimler_arsiv (basvuru_no)",
+    f"CREATE INDEX IF NOT EXISTS ix_denetimler_arsiv_aday ON denetimler (secim_tarihi) WHERE durum IN ({_DURUM_LISTESI})",
+    f"""CREATE OR REPLACE VIEW denetimler_tumu AS
+        SELECT {_SUTUNLAR}, FALSE AS arsivde FROM denetimler
+        UNION ALL SELECT {_SUTUNLAR}, TRUE AS arsivde FROM denetimler_arsiv""",
+]
+
+# Şasi tekilliği arşivi de kapsar: UNIQUE(sasi_no) yalnızca sıcak tabloda, bu tetikleyici her yazma yolunda
+# (form, ilave şasi, şasi atama, toplu aktarım) arşivdeki şasiyi unique_violation ile reddeder.
+ARSIV_SASI_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_denetimler_arsiv_kimlik ON denetimler_arsiv (kimlik_anahtari)",
+    """CREATE OR REPLACE FUNCTION arsiv_sasi_kontrol() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF EXISTS (SELECT 1 FROM denetimler_arsiv WHERE sasi_no = NEW.sasi_no) THEN
+            RAISE EXCEPTION 'Şasi % arşivde kayıtlı', NEW.sasi_no USING ERRCODE = 'unique_violation';
+        END IF;
+        RETURN NEW;
+    END $$""",
+    "CREATE TRIGGER trg_arsiv_sasi BEFORE INSERT OR UPDATE OF sasi_no ON denetimler FOR EACH ROW WHEN (NEW.sasi_no IS NOT NULL) EXECUTE FUNCTION arsiv_sasi_kontrol()",
+]
+
+def _bolum_olustur(conn, yil):
+    conn.execute(text(f"""CREATE TABLE IF NOT EXISTS denetimler_arsiv_{int(yil)} PARTITION OF denetimler_arsiv
+        FOR VALUES FROM ('{int(yil)}-01-01') TO ('{int(yil) + 1}-01-01')"""))
+
+@olculen()
+def arsivle(engine, gun=ARSIV_GUN, parti=ARSIV_PARTI):
+    # Partiler halinde, her parti kendi transaction'ında: DELETE ... RETURNING -> arşive INSERT.
+    # Silme tetikleyicileri özet tabloyu ve silinen_kayitlar günlüğünü günceller.
+    sinir = (date.today() - timedelta(days=gun)).isoformat()
+    tasinan = Counter()
+    while True:
+        with engine.begin() as conn:
+            satirlar = conn.execute(text(f"""SELECT id, extract(year FROM secim_tarihi)::int FROM denetimler
+                WHERE durum IN ({_DURUM_LISTESI}) AND secim_tarihi < :sinir AND COALESCE(silme_talebi, 0) = 0
+                ORDER BY id LIMIT :parti FOR UPDATE SKIP LOCKED"""), {'sinir': sinir, 'parti': int(parti)}).all()
+            if not satirlar: break
+            for yil in {y for _, y in satirlar}: _bolum_olustur(conn, yil)
+            conn.execute(text(f"""WITH tasinan AS (DELETE FROM denetimler WHERE id = ANY(:idler) RETURNING {_SUTUNLAR})
+                INSERT INTO denetimler_arsiv ({_SUTUNLAR}) SELECT {_SUTUNLAR} FROM tasinan"""), {'idler': [i for i, _ in satirlar]})
+        tasinan.update(y for _, y in satirlar)
+        if len(satirlar) < parti: break
+    if tasinan: veri_surumunu_artir()
+    return dict(tasinan)
+
+@olculen()
+def anlik_goruntu_al(engine, klasor, yil):
+    # Arşiv yılının sıkıştırılmış (zstd) Parquet kopyası; DB dışı yedek / analiz için
+    os.makedirs(klasor, exist_ok=True)
+    kosul = ("secim_tarihi >= :bas AND secim_tarihi < :son", {'bas': f"{int(yil)}-01-01", 'son': f"{int(yil) + 1}-01-01"})
+    hedef = os.path.join(klasor, f"denetimler_arsiv_{int(yil)}.parquet")
+    shutil.move(disa_aktar(engine, kosul, 'Parquet', tablo='denetimler_arsiv'), hedef)
+    return hedef
+
+def arsivle_ve_goruntule(engine, klasor=None):
+    tasinan = arsivle(engine)
+    if klasor:
+        for yil in tasinan: anlik_goruntu_al(engine, klasor, yil)
+    return tasinan
@@ -0,0 +1,292 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+import numpy as np
+import openpyxl
+import pandas as pd
+import sqlalchemy
+from sqlalchemy import create_engine, event, text
+from aktarim import disa_aktar, dosyalari_tampona_al, dosyayi_tampona_al, tampondan_aktar, tamponu_temizle
+from gocler import GOCLER, gocleri_uygula
+from veritabani import (ARAMA_IFADESI, ARAMA_SUTUNLARI, ASCII_HARFLER, SAYFA_BOYUTU, TR_HARFLER, arama_sonuclari,
+                        dagilim_getir, kayit_ara, kosul_olustur, metni_normalle, veri_surumunu_artir, verileri_getir)
+from zamanlayici import geciken_islemleri_kontrol_et_ve_bildir
+
+# --- PERFORMANS ÖLÇÜMÜ: python bench.py --satir 100000 --cikti sonuc.json ---
+# Sentetik denetimler/kullanicilar verisi üretir, sıcak yolları (sayfa yükleme, arama, Excel aktarımı,
+# dışa aktarım, gecikme kontrolü) ölçer ve sonucu JSON olarak yazar. Üretim yollarının tamamı yalnızca
+# --db-uri ile verilen boş bir Postgres veritabanında ölçülür; varsayılan geçici SQLite dosyası yalnızca
+# aynı SQL'i çalıştıran okuma yollarını ölçer (POSTGRES_OLCUMLERI atlanır).
+
+# --- SENTETİK VERİ ---
+ILLER = ['Adana', 'Adıyaman', 'Afyonkarahisar', 'Ağrı', 'Amasya', 'Ankara', 'Antalya', 'Artvin', 'Aydın', 'Balıkesir',
+         'Bilecik', 'Bingöl', 'Bitlis', 'Bolu', 'Burdur', 'Bursa', 'Çanakkale', 'Çankırı', 'Çorum', 'Denizli', 'Diyarbakır',
+         'Edirne', 'Elazığ', 'Erzincan', 'Erzurum', 'Eskişehir', 'Gaziantep', 'Giresun', 'Gümüşhane', 'Hakkari', 'Hatay',
+         'Isparta', 'Mersin', 'İstanbul', 'İzmir', 'Kars', 'Kastamonu', 'Kayseri', 'Kırklareli', 'Kırşehir', 'Kocaeli',
+         'Konya', 'Kütahya', 'Malatya', 'Manisa', 'Kahramanmaraş', 'Mardin', 'Muğla', 'Muş', 'Nevşehir', 'Niğde', 'Ordu',
+         'Rize', 'Sakarya', 'Samsun', 'Siirt', 'Sinop', 'Sivas', 'Tekirdağ', 'Tokat', 'Trabzon', 'Tunceli', 'Şanlıurfa',
+         'Uşak', 'Van', 'Yozgat', 'Zonguldak', 'Aksaray', 'Bayburt', 'Karaman', 'Kırıkkale', 'Batman', 'Şırnak', 'Bartın',
+         'Ardahan', 'Iğdır', 'Yalova', 'Karabük', 'Kilis', 'Osmaniye', 'Düzce']
+IL_AGIRLIK = {'İstanbul': 18, 'Ankara': 8, 'İzmir': 6, 'Bursa': 5, 'Kocaeli': 5, 'Antalya': 3, 'Konya': 3, 'Sakarya': 2, 'Manisa': 2}
+MARKALAR = {'Ford': 'NM0', 'Renault': 'VF1', 'Fiat': 'ZFA', 'Toyota': 'NMT', 'Hyundai': 'NLH', 'Volkswagen': 'WVW',
+            'Mercedes-Benz': 'WDB', 'BMW': 'WBA', 'Peugeot': 'VF3', 'Dacia': 'UU1', 'Honda': 'SHH', 'Opel': 'W0L',
+            'Citroën': 'VF7', 'Škoda': 'TMB', 'Tofaş': 'NM4', 'Otokar': 'NMC', 'BMC': 'NMB', 'Temsa': 'NLT', 'Karsan': 'NLK', 'Isuzu': 'NNA'}
+KATEGORILER = ['M1', 'M1', 'M1', 'N1', 'M2', 'M3', 'N2', 'N3', 'L3e', 'O4']
+ULKELER = ['Türkiye', 'Almanya', 'Fransa', 'Japonya', 'Güney Kore', 'İtalya', 'Çin', 'İspanya', 'Çekya']
+DURUMLAR = {'Şasi Bekliyor': 0.25, 'Testte': 0.20, 'Tamamlandı - Olumlu': 0.45, 'Tamamlandı - Olumsuz': 0.10}
+FIRMALAR = [f"{a} {b} {c}" for a in ['Anadolu', 'Marmara', 'Ege', 'Karadeniz', 'Boğaziçi', 'Toros', 'Yıldız', 'Doğan', 'Kuzey', 'Başkent']
+            for b in ['Otomotiv', 'Motorlu Araçlar', 'Taşıt', 'Oto İthalat', 'Araç Sanayi'] for c in ['A.Ş.', 'Ltd. Şti.']]
+VIN_HARFLER = np.array(list("ABCDEFGHJKLMNPRSTUVWXYZ0123456789"))
+EXCEL_BASLIKLARI = {'basvuru_no': 'Başvuru No', 'firma_adi': 'Firma Adı', 'marka': 'Marka', 'arac_kategori': 'Araç Kategori',
+                    'arac_tipi': 'Araç Tipi', 'varyant': 'Varyant', 'versiyon': 'Versiyon', 'ticari_ad': 'Ticari Ad',
+                    'gtip_no': 'Gtip No', 'birim': 'Birim', 'uretim_ulkesi': 'Üretim Ülkesi', 'arac_sayisi': 'Araç Sayısı', 'sasi_no': 'Şasi No'}
+
+def kullanici_adi(il):
+    return "uzman_" + metni_normalle(il).replace(" ", "_")
+
+def _sec(rng, secenekler, n, agirlik=None):
+    p = None if agirlik is None else np.asarray(agirlik, dtype=float) / np.sum(agirlik)
+    return np.asarray(secenekler, dtype=object)[rng.choice(len(secenekler), size=n, p=p)]
+
+def sasi_uret(rng, markalar, sira):
+    # WMI (3) + VDS (6) + model yılı (1) + fabrika (1) + seri (6) = 17 karakter, I/O/Q yok
+    n = len(markalar)
+    wmi = pd.Series([MARKALAR[m] for m in markalar])
+    vds = rng.choice(VIN_HARFLER, size=(n, 6)).view('<U6').ravel()
+    yil_fabrika = rng.choice(VIN_HARFLER, size=(n, 2)).view('<U2').ravel()
+    seri = pd.Series(np.asarray(sira) % 1_000_000).astype(str).str.zfill(6)
+    return (wmi + vds + yil_fabrika + seri).tolist()
+
+def denetim_uret(n, rng, baslangic=0, bugun=None):
+    bugun = bugun or date.today()
+    sira = np.arange(baslangic, baslangic + n)
+    il = _sec(rng, ILLER, n, [IL_AGIRLIK.get(i, 1) for i in ILLER])
+    marka = _sec(rng, list(MARKALAR), n)
+    durum = _sec(rng, list(DURUMLAR), n, list(DURUMLAR.values()))
+    secim = pd.to_datetime(bugun) - pd.to_timedelta(rng.integers(0, 120, n), unit='D')
+    df = pd.DataFrame({
+        'basvuru_no': [f"{2024 + s % 3}-{s // 2:07d}" for s in sira],
+        'firma_adi': _sec(rng, FIRMALAR, n), 'marka': marka, 'arac_kategori': _sec(rng, KATEGORILER, n),
+        'arac_tipi': [f"{m[:3].upper()}-{t}" for m, t in zip(marka, rng.integers(100, 1000, n))],
+        'varyant': _sec(rng, ['A', 'B', 'C', 'D', None], n), 'versiyon': _sec(rng, ['V1', 'V2', 'V3', None], n),
+        'ticari_ad': _sec(rng, ['Comfort', 'Premium', 'Active', 'Elite', 'Cargo', None], n),
+        'gtip_no': [f"8703.{g:02d}.{h:02d}" for g, h in zip(rng.integers(10, 90, n), rng.integers(0, 99, n))],
+        'birim': _sec(rng, ['Gebze', 'Ankara', 'İzmir', 'Bursa'], n), 'uretim_ulkesi': _sec(rng, ULKELER, n),
+        'arac_sayisi': rng.integers(1, 50, n).astype(str),
+        'sasi_no': sasi_uret(rng, marka, sira),
+        'basvuru_tarihi': (secim - pd.to_timedelta(rng.integers(0, 30, n), unit='D')).strftime('%Y-%m-%d'),
+        'secim_tarihi': secim.strftime('%Y-%m-%d'), 'il': il, 'durum': durum,
+        'notlar': _sec(rng, [None, None, None, 'Eksik evrak', 'Tekrar test'], n),
+        'ekleyen_kullanici': [kullanici_adi(i) for i in il], 'silme_talebi': (rng.random(n) < 0.002).astype(int), 'uyari_gonderildi': 0,
+    })
+    df.loc[df['durum'] == 'Şasi Bekliyor', 'sasi_no'] = None
+    return df
+
+def kullanici_uret():
+    satirlar = [('admin', 'x', 'admin', 'admin@example.com', None, 1, 1)]
+    satirlar += [(kullanici_adi(il), 'x', 'uzman', f"{kullanici_adi(il)}@example.com", il, 1, int(il in IL_AGIRLIK)) for il in ILLER]
+    satirlar += [(f"aday_{i}", 'x', 'uzman', None, ILLER[i], 0, 0) for i in range(5)]
+    return pd.DataFrame(satirlar, columns=['kullanici_adi', 'sifre', 'rol', 'email', 'sorumlu_il', 'onay_durumu', 'excel_yukleme_yetkisi'])
+
+def veriyi_yukle(engine, n, rng, parca=50_000):
+    for bas in range(0, n, parca):
+        denetim_uret(min(parca, n - bas), rng, baslangic=bas).to_sql('denetimler', engine, if_exists='append', index=False)
+    kullanici_uret().to_sql('kullanicilar', engine, if_exists='append', index=False)
+
+def excel_uret(yol, n, rng, baslangic, mevcut, mukerrer_orani=0.10, sasi_cakisma_orani=0.05):
+    # Gerçek yüklemelere benzesin diye bir kısmı mevcut başvuru/şasi numaralarını tekrar eder
+    df = denetim_uret(n, rng, baslangic=baslangic)
+    df['sasi_no'] = df['sasi_no'].fillna(pd.Series(sasi_uret(rng, df['marka'], np.arange(n) + baslangic)))
+    if not mevcut.empty:
+        k = int(n * mukerrer_orani); df.loc[:k - 1, 'basvuru_no'] = mevcut['basvuru_no'].sample(k, replace=True, random_state=1).to_numpy()
+        s = int(n * sasi_cakisma_orani); df.loc[k:k + s - 1, 'sasi_no'] = mevcut['sasi_no'].sample(s, replace=True, random_state=2).to_numpy()
+    wb = openpyxl.Workbook(write_only=True); ws = wb.create_sheet()
+    ws.append(list(EXCEL_BASLIKLARI.values()))
+    for satir in df[list(EXCEL_BASLIKLARI)].itertuples(index=False, name=None): ws.append(list(satir))
+    wb.save(yol)
+
+# --- SQLITE KARŞILIĞI ---
+# Şema, göç listesinden mekanik çeviriyle kurulur. Postgres'e özgü adımlar (tetikleyicili özet tablo,
+# pg_trgm, sıra nesnesi, bölümlenmiş arşiv) atlanır; translate() iç içe replace() ile, word_similarity() Python ile karşılanır.
+SQLITE_ATLANAN_GOCLER = {8, 10, 11, 12, 14, 15, 16}
+# COPY, CTE içinde INSERT ... RETURNING ve DB tarafı tarih aritmetiği kullanan yollar; SQLite'ta ölçülmez
+POSTGRES_OLCUMLERI = ['aktarim.excel_tampon', 'aktarim.birlestir', 'aktarim.coklu_tampon', 'geciken_kontrol']
+_SQLITE_ARAMA_IFADESI = "lower(" + "".join("replace(" for _ in TR_HARFLER) + " || ' ' || ".join(f"coalesce({c}, '')" for c in ARAMA_SUTUNLARI) + \
+    "".join(f", '{t}', '{a}')" for t, a in zip(TR_HARFLER, ASCII_HARFLER)) + ")"
+
+def _sqlite_ceviri(sql):
+    for eski, yeni in [(ARAMA_IFADESI, _SQLITE_ARAMA_IFADESI), ('BIGSERIAL PRIMARY KEY', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+                       ('SERIAL PRIMARY KEY', 'INTEGER PRIMARY KEY AUTOINCREMENT'), ('ADD COLUMN IF NOT EXISTS', 'ADD COLUMN'),
+                       (') STORED', ') VIRTUAL'), ('CREATE UNLOGGED TABLE', 'CREATE TABLE'), ('DEFAULT now()', 'DEFAULT CURRENT_TIMESTAMP'),
+                       (' text_pattern_ops', '')]:
+        sql = sql.replace(eski, yeni)
+    return sql
+
+def _trigram(metin):
+    kelimeler = [f"  {k} " for k in str(metin or "").split()]
+    return {k[i:i + 3] for k in kelimeler for i in range(len(k) - 2)}
+
+def _word_similarity(aranan, metin):
+    a = _trigram(aranan)
+    return len(a & _trigram(metin)) / len(a) if a else 0.0
+
+def sqlite_motoru(yol):
+    engine = create_engine(f"sqlite:///{yol}")
+    @event.listens_for(engine, "connect")
+    def _baglanti(dbapi_conn, _):
+        dbapi_conn.create_function("word_similarity", 2, _word_similarity, deterministic=True)
+        dbapi_conn.execute("PRAGMA journal_mode=WAL"); dbapi_conn.execute("PRAGMA synchronous=NORMAL")
+    with engine.begin() as conn:
+        for surum, _, adimlar in GOCLER:
+            if surum in SQLITE_ATLANAN_GOCLER: continue
+            for adim in adimlar: conn.exec_driver_sql(_sqlite_ceviri(adim))
+    return engine
+
+def postgres_motoru(db_uri, temizle):
+    engine = create_engine(db_uri)
+    gocleri_uygula(engine)
+    with engine.begin() as conn:
+        dolu = conn.execute(text("SELECT EXISTS (SELECT 1 FROM denetimler) OR EXISTS (SELECT 1 FROM kullanicilar)")).scalar()
+        if dolu and not temizle: sys.exit("❌ Hedef veritabanı boş değil; yalnızca deneme veritabanında --temizle ile çalıştırın.")
+        conn.execute(text("TRUNCATE denetimler, denetim_ozet, silinen_kayitlar, kullanicilar, aktarim_tampon, mail_kutusu RESTART IDENTITY"))
+    return engine
+
+# --- ÖLÇÜM ---
+def olc(ad, tekrar, fonk, hazirla=None, **ek):
+    # hazirla() her tekrardan önce süre dışında çalışır (önbelleği düşürme, durumu geri alma vb.)
+    sureler, sonuc = [], None
+    for _ in range(tekrar):
+        if hazirla: hazirla()
+        t0 = time.perf_counter(); sonuc = fonk(); sureler.append(time.perf_counter() - t0)
+    sureler.sort()
+    kayit = {'tekrar': tekrar, 'min_sn': round(sureler[0], 6), 'medyan_sn': round(statistics.median(sureler), 6),
+             'p95_sn': round(sureler[min(len(sureler) - 1, int(round(0.95 * (len(sureler) - 1))))], 6), **ek}
+    print(f"  {ad:<28} medyan {kayit['medyan_sn'] * 1000:9.1f} ms", file=sys.stderr)
+    return kayit, sonuc
+
+def olcumleri_yap(engine, n, tekrar, agir_tekrar, aktarim_satir, rng, klasor):
+    olcumler = {}
+    def kaydet(ad, *args, **kwargs):
+        olcumler[ad], sonuc = olc(ad, *args, **kwargs); return sonuc
+    soguk = veri_surumunu_artir  # sürüm anahtarlı önbelleği düşürür
+    admin = kosul_olustur("admin", None)
+    uzman = kosul_olustur("uzman", "İstanbul", kullanici_adi=kullanici_adi("İstanbul"))
+    filtreli = kosul_olustur("admin", None, durumlar=["Testte", "Tamamlandı - Olumlu"], iller=["Ankara", "İzmir", "Bursa"])
+
+    sayfa = kaydet('sayfa.admin_ilk', tekrar, lambda: verileri_getir(engine, admin, limit=SAYFA_BOYUTU + 1), soguk)
+    olcumler['sayfa.admin_ilk']['bellek_bayt'] = int(sayfa.memory_usage(deep=True).sum())
+    kaydet('sayfa.onbellekten', tekrar, lambda: verileri_getir(engine, admin, limit=SAYFA_BOYUTU + 1))
+    kaydet('sayfa.uzman_kapsami', tekrar, lambda: verileri_getir(engine, uzman, limit=SAYFA_BOYUTU + 1), soguk)
+    kaydet('sayfa.il_durum_filtresi', tekrar, lambda: verileri_getir(engine, filtreli, limit=SAYFA_BOYUTU + 1), soguk)
+    kaydet('sayfa.derin_keyset', tekrar, lambda: verileri_getir(engine, admin, son_id=n // 2, limit=SAYFA_BOYUTU + 1), soguk)
+    kaydet('dagilim.il', tekrar, lambda: dagilim_getir(engine, admin, 'il'), soguk)
+
+    ornek = verileri_getir(engine, ("sasi_no IS NOT NULL", {}), limit=1)
+    for ad, kelime in [('firma_turkce', 'boğaziçi taşıt'), ('marka', 'renault'), ('sasi_parcasi', ornek['sasi_no'].iloc[0][5:12].lower())]:
+        # Satır sayısı da kaydedilir: hata sonucu dönen boş çerçeve hızlı görünür
+        olcumler[f'arama.{ad}']['satir'] = len(kaydet(f'arama.{ad}', tekrar, lambda: arama_sonuclari(engine, kosul_olustur("admin", None, kelime=kelime)), soguk))
+    kaydet('onek.sasi_no', tekrar, lambda: kayit_ara(engine, admin, 'sasi_no', ornek['sasi_no'].iloc[0][:4]), soguk)
+    kaydet('onek.basvuru_no', tekrar, lambda: kayit_ara(engine, uzman, 'basvuru_no', "2025-00"), soguk)
+
+    pg = engine.dialect.name == 'postgresql'
+    if pg:
+        # Excel aktarımı: her tekrar yeni bir dosya (yeni şasiler + %10 mükerrer başvuru + %5 mevcut şasi)
+        mevcut = verileri_getir.__wrapped__(engine, ("sasi_no IS NOT NULL", {}), limit=10_000)
+        dosyalar = []
+        for i in range(agir_tekrar):
+            yol = os.path.join(klasor, f"aktarim_{i}.xlsx"); dosyalar.append(yol)
+            excel_uret(yol, aktarim_satir, rng, baslangic=n + i * aktarim_satir, mevcut=mevcut)
+        tampon, sayac = [], iter(dosyalar)
+        def tampona_al():
+            yol = next(sayac)
+            with open(yol, 'rb') as f: sonuc = dosyayi_tampona_al(engine, f, yol, 'bench', {'durum': 'Şasi Bekliyor', 'il': 'Ankara'})
+            tampon.append(sonuc); return sonuc
+        kaydet('aktarim.excel_tampon', agir_tekrar, tampona_al, satir=aktarim_satir)
+        sira = iter(tampon)
+        sonuc = kaydet('aktarim.birlestir', agir_tekrar, lambda: tampondan_aktar(engine, next(sira)['aktarim_id']), satir=aktarim_satir)
+        olcumler['aktarim.birlestir'].update(eklenen=sonuc['eklenen'], mukerrer_sasi=sonuc['mukerrer_sasi'], atlanan=tampon[-1]['atlanan'])
+        # Aynı dosyalar tek partide: ayrıştırma süreç havuzunda (ilk tekrar havuzu da açar); tampon her tekrarda boşaltılır
+        toplu, partiler = [], []
+        for yol in dosyalar:
+            with open(yol, 'rb') as f: toplu.append((os.path.basename(yol), f.read()))
+        def onceki_partiyi_sil():
+            while partiler: tamponu_temizle(engine, partiler.pop()['aktarim_id'])
+        def coklu_tampona_al():
+            sonuc = dosyalari_tampona_al(engine, toplu, 'bench', {'durum': 'Şasi Bekliyor', 'il': 'Ankara'}); partiler.append(sonuc); return sonuc
+        kaydet('aktarim.coklu_tampon', agir_tekrar, coklu_tampona_al, onceki_partiyi_sil, satir=aktarim_satir * len(toplu), dosya=len(toplu))
+        onceki_partiyi_sil()
+
+    ist = kosul_olustur("uzman", "İstanbul")
+    for bicim in ['CSV', 'XLSX', 'Parquet']:
+        yol = kaydet(f'disa_aktar.{bicim.lower()}', agir_tekrar, lambda: disa_aktar(engine, ist, bicim))
+        olcumler[f'disa_aktar.{bicim.lower()}']['dosya_bayt'] = os.path.getsize(yol); os.remove(yol)
+
+    if pg:
+        def uyarilari_sifirla():
+            with engine.begin() as conn: conn.execute(text("UPDATE denetimler SET uyari_gonderildi = 0 WHERE uyari_gonderildi = 1"))
+        adet = kaydet('geciken_kontrol', agir_tekrar, lambda: geciken_islemleri_kontrol_et_ve_bildir(engine, "admin@example.com"), uyarilari_sifirla)
+        olcumler['geciken_kontrol']['isaretlenen'] = adet
+    else: print(f"  (SQLite: {', '.join(POSTGRES_OLCUMLERI)} yalnızca --db-uri ile ölçülür)", file=sys.stderr)
+    return olcumler
+
+# --- KARŞILAŞTIRMA ---
+def karsilastir(onceki_yol, olcumler, esik):
+    with open(onceki_yol, encoding='utf-8') as f: onceki = json.load(f)['olcumler']
+    gerileyen = {}
+    for ad, kayit in olcumler.items():
+        if ad in onceki and onceki[ad]['medyan_sn'] > 0:
+            oran = kayit['medyan_sn'] / onceki[ad]['medyan_sn']
+            kayit['onceki_oran'] = round(oran, 3)
+            if oran > esik: gerileyen[ad] = round(oran, 3)
+    return gerileyen
+
+def main():
+    ap = argparse.ArgumentParser(description="TSE portalı sıcak yol ölçümleri")
+    ap.add_argument('--satir', type=int, default=10_000, help="denetimler satır sayısı (10k-1M)")
+    ap.add_argument('--tekrar', type=int, default=5, help="okuma ölçümleri için tekrar")
+    ap.add_argument('--agir-tekrar', type=int, default=2, help="aktarım/dışa aktarım/gecikme ölçümleri için tekrar")
+    ap.add_argument('--aktarim-satir', type=int, default=5_000, help="her Excel dosyasındaki satır sayısı")
+    ap.add_argument('--tohum', type=int, default=42)
+    ap.add_argument('--db-uri', default=os.environ.get('BENCH_DB_URI'), help="boş bir Postgres veritabanı (varsayılan: geçici SQLite)")
+    ap.add_argument('--temizle', action='store_true', help="--db-uri hedefindeki tabloları boşalt")
+    ap.add_argument('--cikti', help="JSON sonucun yazılacağı dosya (varsayılan: stdout)")
+    ap.add_argument('--karsilastir', help="önceki JSON sonuç; medyanı --esik katından fazla artan ölçümler hata sayılır")
+    ap.add_argument('--esik', type=float, default=1.25)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.tohum)
+    klasor = tempfile.mkdtemp(prefix="tse_bench_")
+    try:
+        engine = postgres_motoru(args.db_uri, args.temizle) if args.db_uri else sqlite_motoru(os.path.join(klasor, "bench.db"))
+        print(f"⏳ {args.satir} satır üretiliyor ({engine.dialect.name})...", file=sys.stderr)
+        t0 = time.perf_counter(); veriyi_yukle(engine, args.satir, rng); uretim_sn = time.perf_counter() - t0
+        olcumler = olcumleri_yap(engine, args.satir, args.tekrar, args.agir_tekrar, args.aktarim_satir, rng, klasor)
+        engine.dispose()
+    finally: shutil.rmtree(klasor, ignore_errors=True)
+
+    sonuc = {
+        'zaman': datetime.now().isoformat(timespec='seconds'),
+        'ortam': {'arka_uc': engine.dialect.name, 'python': platform.python_version(), 'pandas': pd.__version__,
+                  'sqlalchemy': sqlalchemy.__version__, 'sqlite': sqlite3.sqlite_version, 'makine': platform.machine()},
+        'veri': {'denetimler': args.satir, 'aktarim_satir': args.aktarim_satir, 'tohum': args.tohum, 'uretim_sn': round(uretim_sn, 3)},
+        'olcumler': olcumler,
+    }
+    gerileyen = karsilastir(args.karsilastir, olcumler, args.esik) if args.karsilastir else {}
+    if args.karsilastir: sonuc['gerileyen'] = gerileyen
+    metin = json.dumps(sonuc, ensure_ascii=False, indent=2)
+    if args.cikti:
+        with open(args.cikti, 'w', encoding='utf-8') as f: f.write(metin + "\n")
+    else: print(metin)
+    if gerileyen:
+        print(f"❌ Gerileme: {gerileyen}", file=sys.stderr); sys.exit(1)
+
+if __name__ == "__main__":
+    main()
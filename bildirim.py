@@ -0,0 +1,103 @@
+import smtplib
+import threading
+import time
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from sqlalchemy import text
+from olcum import olculen
+
+# --- MAIL KUTUSU (OUTBOX) ---
+# Bildirimler yazma işlemiyle aynı transaction içinde tabloya eklenir; tek bir arka plan
+# işçisi kutuyu partiler halinde, tek SMTP oturumu üzerinden boşaltır.
+MAIL_KUTUSU_DDL = """CREATE TABLE IF NOT EXISTS mail_kutusu (
+    id BIGSERIAL PRIMARY KEY, alici TEXT NOT NULL, konu TEXT NOT NULL, icerik TEXT NOT NULL,
+    durum TEXT NOT NULL DEFAULT 'bekliyor', deneme_sayisi INTEGER NOT NULL DEFAULT 0,
+    sonraki_deneme TIMESTAMP NOT NULL DEFAULT now(), olusturma TIMESTAMP NOT NULL DEFAULT now(),
+    gonderilme TIMESTAMP, son_hata TEXT)"""
+MAIL_KUTUSU_INDEKS = "CREATE INDEX IF NOT EXISTS ix_mail_kutusu_bekleyen ON mail_kutusu (sonraki_deneme) WHERE durum = 'bekliyor'"
+
+PARTI_BOYUTU = 50
+MAKS_DENEME = 6          # 1, 2, 4, 8, 16 dk aralıklarla dener, sonra 'hata' olarak bırakır
+BEKLEME_SN = 10
+MAIL_SAKLAMA_GUN = 30    # gönderilmiş kayıtlar bu kadar gün sonra silinir; 'hata' olanlar incelenmek üzere kalır
+KUTU_DURUMU_OMRU = 30    # yönetici panelindeki sayaçlar: işçi durumu arka planda değiştirdiği için süreli önbellek
+
+def mail_kuyruga_ekle(cursor, kime, konu, icerik):
+    cursor.execute("INSERT INTO mail_kutusu (alici, konu, icerik) VALUES (%s, %s, %s)", (kime, konu, icerik))
+
+def _mesaj_olustur(gonderen, kime, mesajlar):
+    # Aynı alıcıya biriken bildirimler tek e-postada birleştirilir
+    msg = MIMEMultipart()
+    konu = mesajlar[0][1] if len(mesajlar) == 1 else f"TSE Sistemi - {len(mesajlar)} Yeni Bildirim"
+    govde = mesajlar[0][2] if len(mesajlar) == 1 else "<hr>".join(f"<h4>{k}</h4><p>{i}</p>" for _, k, i in mesajlar)
+    msg['From'], msg['To'], msg['Subject'] = gonderen, kime, konu
+    msg.attach(MIMEText(f"<html><body><h3>TSE Bildirim</h3><p>{govde}</p></body></html>", 'html'))
+    return msg
+
+@olculen()
+def kutuyu_bosalt(engine, ayar):
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""SELECT id, alici, konu, icerik FROM mail_kutusu
+            WHERE durum = 'bekliyor' AND sonraki_deneme <= now() ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED""", (PARTI_BOYUTU,))
+        satirlar = cursor.fetchall()
+        if not satirlar: conn.commit(); return 0
+        gruplar = {}
+        for m_id, alici, konu, icerik in satirlar: gruplar.setdefault(alici, []).append((m_id, konu, icerik))
+
+        gonderilen, hatalar = [], []
+        try:
+            server = smtplib.SMTP_SSL(ayar['sunucu'], ayar['port'], timeout=30)
+            server.login(ayar['kullanici'], ayar['sifre'])
+        except Exception as e:
+            hatalar = [([m[0] for m in g], str(e)) for g in gruplar.values()]
+        else:
+            for alici, mesajlar in gruplar.items():
+                try:
+                    server.send_message(_mesaj_olustur(ayar['kullanici'], alici, mesajlar)); gonderilen += [m[0] for m in mesajlar]
+                except Exception as e: hatalar.append(([m[0] for m in mesajlar], str(e)))
+            try: server.quit()
+            except Exception: pass
+
+        if gonderilen:
+            cursor.execute("UPDATE mail_kutusu SET durum = 'gonderildi', gonderilme = now() WHERE id = ANY(%s)", (gonderilen,))
+        for idler, hata in hatalar:
+            cursor.execute("""UPDATE mail_kutusu SET deneme_sayisi = deneme_sayisi + 1, son_hata = %s,
+                sonraki_deneme = now() + interval '1 minute' * power(2, deneme_sayisi),
+                durum = CASE WHEN deneme_sayisi + 1 >= %s THEN 'hata' ELSE 'bekliyor' END WHERE id = ANY(%s)""", (hata[:500], MAKS_DENEME, idler))
+        conn.commit()
+        return len(satirlar)
+    finally: conn.close()
+
+# --- ARKA PLAN İŞÇİSİ (süreç başına tek) ---
+_isci = {'thread': None}
+_isci_kilidi = threading.Lock()
+
+def _isci_dongusu(engine, ayar):
+    while True:
+        try: islenen = kutuyu_bosalt(engine, ayar)
+        except Exception: islenen = 0
+        if islenen < PARTI_BOYUTU: time.sleep(BEKLEME_SN)
+
+def mail_iscisini_baslat(engine, ayar):
+    with _isci_kilidi:
+        if _isci['thread'] is None or not _isci['thread'].is_alive():
+            _isci['thread'] = threading.Thread(target=_isci_dongusu, args=(engine, ayar), name="mail-kutusu", daemon=True)
+            _isci['thread'].start()
+
+_kutu_durumu = {'zaman': 0.0, 'durum': None}
+_kutu_durumu_kilidi = threading.Lock()
+
+def kutu_durumu(engine):
+    with _kutu_durumu_kilidi:
+        if _kutu_durumu['durum'] is not None and time.monotonic() - _kutu_durumu['zaman'] < KUTU_DURUMU_OMRU:
+            return _kutu_durumu['durum']
+    with engine.connect() as conn:
+        durum = dict(conn.execute(text("SELECT durum, COUNT(*) FROM mail_kutusu GROUP BY durum")).all())
+    with _kutu_durumu_kilidi: _kutu_durumu.update(zaman=time.monotonic(), durum=durum)
+    return durum
+
+def mail_kutusunu_temizle(engine, gun=MAIL_SAKLAMA_GUN):
+    with engine.begin() as conn:
+        return conn.execute(text("DELETE FROM mail_kutusu WHERE durum = 'gonderildi' AND gonderilme < now() - make_interval(days => :gun)"), {'gun': int(gun)}).rowcount
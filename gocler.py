@@ -0,0 +1,106 @@
+import os
+from aktarim import TAMPON_DDL
+from arsiv import ARSIV_DDL, ARSIV_SASI_DDL
+from bildirim import MAIL_KUTUSU_DDL, MAIL_KUTUSU_INDEKS
+from veritabani import ARAMA_IFADESI, DEGISIKLIK_DDL, DEGISIKLIK_XID_DDL, OZET_DDL, OZET_FONKSIYONU, havuz_olustur, kimlik_ifadesi
+from zamanlayici import GECIKEN_INDEKS
+
+# --- ŞEMA GÖÇLERİ (MIGRATIONS) ---
+# Her göç bir kez uygulanır ve sema_surumu tablosuna yazılır. Adımlar SQL metni ya da imleç alan
+# bir fonksiyondur. Mevcut kurulumlarda da güvenle çalışmaları için IF NOT EXISTS kullanılır.
+# Yeni şema değişikliği = listenin sonuna yeni numaralı göç; eski göçler değiştirilmez.
+
+def _ozet_tablosu(cursor):
+    cursor.execute("SELECT to_regclass('denetim_ozet') IS NULL")
+    if cursor.fetchone()[0]:
+        cursor.execute("LOCK TABLE denetimler IN SHARE ROW EXCLUSIVE MODE")
+        for komut in OZET_DDL: cursor.execute(komut)
+
+GOCLER = [
+    (1, "Temel tablolar", [
+        '''CREATE TABLE IF NOT EXISTS denetimler (
+            id SERIAL PRIMARY KEY, basvuru_no TEXT, firma_adi TEXT NOT NULL, marka TEXT,
+            arac_kategori TEXT, arac_tipi TEXT NOT NULL, varyant TEXT, versiyon TEXT, ticari_ad TEXT,
+            gtip_no TEXT, birim TEXT, uretim_ulkesi TEXT, arac_sayisi TEXT, sasi_no TEXT UNIQUE,
+            basvuru_tarihi DATE, secim_tarihi DATE, il TEXT, durum TEXT DEFAULT 'Şasi Bekliyor',
+            notlar TEXT, guncelleme_tarihi TEXT, ekleyen_kullanici TEXT, silme_talebi INTEGER DEFAULT 0, silme_nedeni TEXT)''',
+        '''CREATE TABLE IF NOT EXISTS kullanicilar (
+            id SERIAL PRIMARY KEY, kullanici_adi TEXT UNIQUE NOT NULL, sifre TEXT NOT NULL,
+            rol TEXT NOT NULL, email TEXT, sorumlu_il TEXT, onay_durumu INTEGER DEFAULT 1, excel_yukleme_yetkisi INTEGER DEFAULT 0)''',
+        "ALTER TABLE denetimler ADD COLUMN IF NOT EXISTS uyari_gonderildi INTEGER DEFAULT 0",
+    ]),
+    (2, "Ana Tablo filtre ve keyset sayfalama indeksleri", [
+        "CREATE INDEX IF NOT EXISTS ix_denetimler_il_durum_id ON denetimler (il, durum, id)",
+        "CREATE INDEX IF NOT EXISTS ix_denetimler_durum_id ON denetimler (durum, id)",
+        "CREATE INDEX IF NOT EXISTS ix_denetimler_ekleyen ON denetimler (ekleyen_kullanici)",
+    ]),
+    (3, "Kelime arama sütunu", [
+        f"ALTER TABLE denetimler ADD COLUMN IF NOT EXISTS arama_metni TEXT GENERATED ALWAYS AS ({ARAMA_IFADESI}) STORED",
+    ]),
+    (4, "Toplu aktarım tampon tablosu", [
+        TAMPON_DDL,
+        "CREATE INDEX IF NOT EXISTS ix_aktarim_tampon_id ON aktarim_tampon (aktarim_id)",
+    ]),
+    (5, "Mükerrer kontrol kimliği ve başvuru no indeksi", [
+        f"ALTER TABLE denetimler ADD COLUMN IF NOT EXISTS kimlik_anahtari TEXT GENERATED ALWAYS AS ({kimlik_ifadesi()}) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_denetimler_kimlik ON denetimler (kimlik_anahtari)",
+        "CREATE INDEX IF NOT EXISTS ix_denetimler_basvuru_no ON denetimler (basvuru_no)",
+    ]),
+    (6, "Mail kutusu", [MAIL_KUTUSU_DDL, MAIL_KUTUSU_INDEKS]),
+    (7, "Gecikme kontrolü kısmi indeksi", [GECIKEN_INDEKS]),
+    (8, "Dashboard özet tablosu ve tetikleyiciler", [_ozet_tablosu]),
+    (9, "Yazdıkça-ara önek indeksleri", [
+        "CREATE INDEX IF NOT EXISTS ix_denetimler_sasi_onek ON denetimler (upper(sasi_no) text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_denetimler_basvuru_onek ON denetimler (upper(basvuru_no) text_pattern_ops)",
+    ]),
+    (10, "Kelime arama trigram indeksi", [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_denetimler_arama_trgm ON denetimler USING gin (arama_metni gin_trgm_ops)",
+    ]),
+    (11, "Değişiklik akışı: sıra numarası ve silinen kayıt günlüğü", DEGISIKLIK_DDL),
+    (12, "Tamamlanmış denetimler için yıllık bölümlenmiş arşiv", ARSIV_DDL),
+    (13, "Silme talepleri kısmi indeksi", [
+        "CREATE INDEX IF NOT EXISTS ix_denetimler_silme_talebi ON denetimler (id) WHERE silme_talebi = 1",
+    ]),
+    (14, "Arşivdeki şasilerin yeniden kullanımını engelleyen tetikleyici", ARSIV_SASI_DDL),
+    (15, "Değişiklik akışı: commit sırasına göre sürüm için transaction kimliği", DEGISIKLIK_XID_DDL),
+    (16, "Özet tetikleyicisi: satırlar anahtar sırasıyla kilitlenir", [OZET_FONKSIYONU]),
+]
+# pg_trgm yetkisi olmayan sunucularda bu göçler atlanır (kaydedilmez, sonraki açılışta yeniden denenir);
+# kelime araması bu durumda indekssiz LIKE ve YEDEK_ARAMA_SIRASI ile çalışır (veritabani.trigram_var_mi)
+OPSIYONEL_GOCLER = {10}
+GOC_KILIDI = 7419001  # pg_advisory_lock anahtarı: aynı anda tek süreç göç uygular
+
+def gocleri_uygula(engine):
+    uygulanan = []
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SET statement_timeout = 0")  # büyük tablolarda sütun ekleme havuz zaman aşımına takılmasın
+        cursor.execute("SELECT pg_advisory_lock(%s)", (GOC_KILIDI,))
+        try:
+            cursor.execute("CREATE TABLE IF NOT EXISTS sema_surumu (surum INTEGER PRIMARY KEY, aciklama TEXT, uygulanma TIMESTAMP DEFAULT now())")
+            conn.commit()
+            cursor.execute("SELECT surum FROM sema_surumu")
+            mevcut = {r[0] for r in cursor.fetchall()}
+            for surum, aciklama, adimlar in GOCLER:
+                if surum in mevcut: continue
+                try:
+                    for adim in adimlar:
+                        if callable(adim): adim(cursor)
+                        else: cursor.execute(adim)
+                    cursor.execute("INSERT INTO sema_surumu (surum, aciklama) VALUES (%s, %s)", (surum, aciklama))
+                    conn.commit(); uygulanan.append(surum)
+                except Exception:
+                    conn.rollback()
+                    if surum not in OPSIYONEL_GOCLER: raise
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (GOC_KILIDI,))
+            cursor.execute("RESET statement_timeout"); conn.commit()
+    finally: conn.close()
+    return uygulanan
+
+# --- DAĞITIM SIRASINDA ÇALIŞTIRMA: python gocler.py ---
+if __name__ == "__main__":
+    uygulanan = gocleri_uygula(havuz_olustur(os.environ["DB_URI"], havuz_boyutu=1, ek_baglanti=0))
+    print(f"✅ Uygulanan göçler: {uygulanan}" if uygulanan else "✅ Şema güncel.")
@@ -0,0 +1,128 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+import pandas as pd
+from sqlalchemy import event
+
+# --- ÖLÇÜM (span + SQL) ---
+# Süreç içi halka tamponlar: en son SPAN_KAPASITESI bölüm süresi ve SORGU_KAPASITESI SQL çalıştırması.
+# Her sorgu, o anda açık olan en içteki span'in adıyla ('kaynak') kaydedilir.
+SPAN_KAPASITESI = 5000
+SORGU_KAPASITESI = 2000
+SQL_UZUNLUGU = 300
+
+_spanlar = deque(maxlen=SPAN_KAPASITESI)
+_sorgular = deque(maxlen=SORGU_KAPASITESI)
+_yerel = threading.local()
+_log = logging.getLogger("tse.olcum")
+_log_ayari = {'acik': False, 'yavas_ms': 0}
+
+def log_ayarla(acik, yavas_ms=0):
+    # Açıksa her span ve yavas_ms üzerindeki her sorgu tek satır JSON olarak 'tse.olcum' logger'ına yazılır
+    _log_ayari.update(acik=bool(acik), yavas_ms=float(yavas_ms))
+    if acik and not _log.handlers:
+        h = logging.StreamHandler(); h.setFormatter(logging.Formatter("%(message)s"))
+        _log.addHandler(h); _log.setLevel(logging.INFO); _log.propagate = False
+
+def _yigin():
+    if not hasattr(_yerel, 'yigin'): _yerel.yigin = []
+    return _yerel.yigin
+
+def _logla(kayit):
+    if _log_ayari['acik']: _log.info(json.dumps(kayit, ensure_ascii=False, default=str))
+
+def span_kaydet(ad, sure):
+    kayit = {'tur': 'span', 'ad': ad, 'sure_ms': round(sure * 1000, 3), 'zaman': time.time()}
+    _spanlar.append(kayit); _logla(kayit)
+
+@contextmanager
+def olc(ad):
+    yigin = _yigin(); yigin.append(ad)
+    t0 = time.perf_counter()
+    try: yield
+    finally:
+        yigin.pop(); span_kaydet(ad, time.perf_counter() - t0)
+
+def olculen(ad=None):
+    def sarici(fonk):
+        @wraps(fonk)
+        def sarmal(*args, **kwargs):
+            with olc(ad or fonk.__name__): return fonk(*args, **kwargs)
+        return sarmal
+    return sarici
+
+def sorgu_kaydet(sql, sure, satir):
+    if isinstance(sql, bytes): sql = sql.decode('utf-8', 'replace')
+    yigin = _yigin()
+    kayit = {'tur': 'sorgu', 'sql': re.sub(r"\s+", " ", str(sql)).strip()[:SQL_UZUNLUGU], 'sure_ms': round(sure * 1000, 3),
+             'satir': satir if satir is not None and satir >= 0 else None, 'kaynak': yigin[-1] if yigin else '-', 'zaman': time.time()}
+    _sorgular.append(kayit)
+    if kayit['sure_ms'] >= _log_ayari['yavas_ms']: _logla(kayit)
+
+# --- SQL KANCALARI ---
+# psycopg2: bağlantının cursor_factory'si ölçen imleçle değiştirilir; hem SQLAlchemy hem engine.raw_connection()
+# üzerinden açılan ham imleçler (get_db) yakalanır. Diğer sürücülerde SQLAlchemy olayları kullanılır.
+def _psycopg2_imleci():
+    import psycopg2.extensions
+    class OlculenImlec(psycopg2.extensions.cursor):
+        def execute(self, sql, args=None):
+            t0 = time.perf_counter()
+            try: return super().execute(sql, args)
+            finally: sorgu_kaydet(sql, time.perf_counter() - t0, self.rowcount)
+        def executemany(self, sql, args_listesi):
+            t0 = time.perf_counter()
+            try: return super().executemany(sql, args_listesi)
+            finally: sorgu_kaydet(sql, time.perf_counter() - t0, self.rowcount)
+        def copy_expert(self, sql, dosya, size=8192):
+            t0 = time.perf_counter()
+            try: return super().copy_expert(sql, dosya, size)
+            finally: sorgu_kaydet(sql, time.perf_counter() - t0, self.rowcount)
+    return OlculenImlec
+
+def motoru_izle(engine):
+    if engine.dialect.driver == 'psycopg2':
+        imlec = _psycopg2_imleci()
+        @event.listens_for(engine, "connect")
+        def _baglanti(dbapi_conn, _): dbapi_conn.cursor_factory = imlec
+        return engine
+    @event.listens_for(engine, "before_cursor_execute")
+    def _once(conn, cursor, sql, params, context, executemany): conn.info.setdefault('olcum_t0', []).append(time.perf_counter())
+    @event.listens_for(engine, "after_cursor_execute")
+    def _sonra(conn, cursor, sql, params, context, executemany):
+        sorgu_kaydet(sql, time.perf_counter() - conn.info['olcum_t0'].pop(), cursor.rowcount)
+    @event.listens_for(engine, "handle_error")
+    def _hata(ctx):
+        if ctx.connection is not None and ctx.connection.info.get('olcum_t0'): ctx.connection.info['olcum_t0'].pop()
+    return engine
+
+# --- RAPORLAR (Admin > Performans) ---
+def _yuzdelikler(df, anahtar):
+    g = df.groupby(anahtar)['sure_ms']
+    return pd.DataFrame({'adet': g.size(), 'p50_ms': g.median(), 'p95_ms': g.quantile(0.95), 'maks_ms': g.max(), 'toplam_ms': g.sum()}) \
+        .round(1).sort_values('toplam_ms', ascending=False).reset_index()
+
+def span_ozeti():
+    df = pd.DataFrame(list(_spanlar))
+    return _yuzdelikler(df, 'ad') if not df.empty else pd.DataFrame(columns=['ad', 'adet', 'p50_ms', 'p95_ms', 'maks_ms', 'toplam_ms'])
+
+def sorgu_ozeti():
+    df = pd.DataFrame(list(_sorgular))
+    return _yuzdelikler(df, 'sql') if not df.empty else pd.DataFrame(columns=['sql', 'adet', 'p50_ms', 'p95_ms', 'maks_ms', 'toplam_ms'])
+
+def en_yavas_sorgular(n=20):
+    df = pd.DataFrame(list(_sorgular))
+    if df.empty: return pd.DataFrame(columns=['zaman', 'sure_ms', 'satir', 'kaynak', 'sql'])
+    df = df.nlargest(n, 'sure_ms')
+    return df.assign(zaman=pd.to_datetime(df['zaman'], unit='s'), satir=df['satir'].astype('Int64'))[['zaman', 'sure_ms', 'satir', 'kaynak', 'sql']]
+
+def kayitlari_disa_ver():
+    # JSON Lines: log toplayıcılarına doğrudan verilebilir
+    return "\n".join(json.dumps(k, ensure_ascii=False) for k in list(_spanlar) + list(_sorgular))
+
+def olcumleri_temizle():
+    _spanlar.clear(); _sorgular.clear()
@@ -0,0 +1,352 @@
+import pandas as pd
+from sqlalchemy import create_engine, text, bindparam
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import ProgrammingError
+from collections import OrderedDict
+from functools import wraps
+import threading
+import time
+from olcum import olculen
+
+# --- BAĞLANTI HAVUZU ---
+# Ham imleçler (engine.raw_connection) ve pandas okuma/yazmaları aynı havuzu paylaşır.
+def havuz_olustur(db_uri, havuz_boyutu=5, ek_baglanti=10, sorgu_zaman_asimi_ms=30000, geri_donusum_sn=1800):
+    ayarlar = {'pool_pre_ping': True, 'pool_recycle': geri_donusum_sn}
+    if make_url(db_uri).get_backend_name() == 'postgresql':
+        ayarlar.update(pool_size=havuz_boyutu, max_overflow=ek_baglanti, pool_timeout=30,
+                       connect_args={'options': f'-c statement_timeout={int(sorgu_zaman_asimi_ms)}', 'connect_timeout': 10})
+    return create_engine(db_uri, **ayarlar)
+
+# --- SÜRÜM ANAHTARLI ÖNBELLEK ---
+# Yazma yapan her yardımcı veri_surumunu_artir() çağırır; anahtarında eski sürüm olan
+# kayıtlar bir daha okunmaz ve LRU sırasıyla düşer. Boşta geçen rerun'lar DB'ye gitmez.
+ONBELLEK_KAPASITESI = 256
+ONBELLEK_OMRU = 300  # sn; başka süreçlerden gelen yazmalar için üst sınır
+_onbellek = OrderedDict()
+_kilit = threading.Lock()
+_durum = {'surum': 0, 'isabet': 0, 'iska': 0}
+
+def veri_surumunu_artir():
+    with _kilit: _durum['surum'] += 1
+
+def veri_surumu():
+    with _kilit: return _durum['surum']
+
+def onbellek_istatistikleri():
+    with _kilit:
+        toplam = _durum['isabet'] + _durum['iska']
+        return {**_durum, 'kayit': len(_onbellek), 'isabet_orani': _durum['isabet'] / toplam if toplam else 0.0}
+
+def surum_onbellekli(fonk):
+    @wraps(fonk)
+    def sarmal(engine, *args, **kwargs):
+        with _kilit:
+            anahtar = (fonk.__name__, str(engine.url), _durum['surum'], repr(args), repr(sorted(kwargs.items())))
+            kayit = _onbellek.get(anahtar)
+            if kayit and time.monotonic() - kayit[0] < ONBELLEK_OMRU:
+                _onbellek.move_to_end(anahtar); _durum['isabet'] += 1
+                return kayit[1]
+            _durum['iska'] += 1
+        sonuc = fonk(engine, *args, **kwargs)
+        if hata_sonucu_mu(sonuc): return sonuc
+        with _kilit:
+            _onbellek[anahtar] = (time.monotonic(), sonuc); _onbellek.move_to_end(anahtar)
+            while len(_onbellek) > ONBELLEK_KAPASITESI: _onbellek.popitem(last=False)
+        return sonuc
+    return sarmal
+
+# Okuyucular hata durumunda boş bir çerçeve döndürür; bu çerçeve işaretlenir ve önbelleğe alınmaz,
+# böylece geçici bir hata (ör. statement_timeout) ONBELLEK_OMRU boyunca tüm oturumlara yayılmaz.
+def hata_sonucu(df):
+    df.attrs['hata'] = True
+    return df
+
+def hata_sonucu_mu(sonuc):
+    if isinstance(sonuc, tuple): return any(hata_sonucu_mu(x) for x in sonuc)
+    return isinstance(sonuc, pd.DataFrame) and sonuc.attrs.get('hata', False)
+
+# --- SORGU KATMANI ---
+SAYFA_BOYUTU = 200
+# Okuma yapılabilen kaynaklar: sıcak tablo, sıcak+arşiv görünümü (arsiv.py) ve arşivin kendisi
+TABLOLAR = {'denetimler', 'denetimler_tumu', 'denetimler_arsiv'}
+
+def tablo_dogrula(tablo):
+    if tablo not in TABLOLAR: raise ValueError(tablo)
+    return tablo
+
+# --- ARAMA (Türkçe harf katlamalı, trigram indeksli) ---
+# arama_metni yazımda DB tarafından üretilir (GENERATED ... STORED); Python tarafı aynı katlamayı uygular
+ARAMA_SUTUNLARI = ['marka', 'sasi_no', 'firma_adi', 'basvuru_no']
+TR_HARFLER, ASCII_HARFLER = 'İIıŞşĞğÜüÖöÇç', 'iiissgguuoocc'
+_TR_KATLAMA = str.maketrans(TR_HARFLER, ASCII_HARFLER)
+ARAMA_IFADESI = "lower(translate(" + " || ' ' || ".join(f"coalesce({c}, '')" for c in ARAMA_SUTUNLARI) + f", '{TR_HARFLER}', '{ASCII_HARFLER}'))"
+ARAMA_SIRASI = "word_similarity(:ham, arama_metni) DESC, id DESC"
+# pg_trgm kurulamamış sunucular (göç 10 opsiyonel): ifadenin tamamını içerenler önce, sonra en yeniler
+YEDEK_ARAMA_SIRASI = "(strpos(arama_metni, :ham) > 0) DESC, id DESC"
+_trigram = {}
+
+def trigram_var_mi(engine):
+    # word_similarity() yalnızca bir kez denenir; "fonksiyon yok" kalıcıdır, bağlantı hataları saklanmaz
+    anahtar = str(engine.url)
+    if anahtar not in _trigram:
+        try:
+            with engine.connect() as conn: conn.execute(text("SELECT word_similarity('a', 'a')"))
+            _trigram[anahtar] = True
+        except ProgrammingError: _trigram[anahtar] = False
+        except Exception: return False
+    return _trigram[anahtar]
+
+# --- MÜKERRER KONTROLÜ: firma+marka+tip kimliği (küçük harf, boşluksuz) ---
+def kimlik_ifadesi(onek=""):
+    return f"lower(replace(coalesce({onek}firma_adi, '') || coalesce({onek}marka, '') || coalesce({onek}arac_tipi, ''), ' ', ''))"
+
+def metni_normalle(metin):
+    return " ".join(str(metin).translate(_TR_KATLAMA).lower().split())
+
+def _like_kacis(metin):
+    return metin.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def sorgu_hazirla(sql, params):
+    # Liste/tuple parametreler "IN :param" içinde genişletilir
+    genis = [bindparam(k, expanding=True) for k, v in params.items() if isinstance(v, (list, tuple))]
+    return text(sql).bindparams(*genis) if genis else text(sql)
+
+def kosul_olustur(rol, sorumlu_il, kullanici_adi=None, durumlar=(), iller=(), kelime=""):
+    parcalar, params = [], {}
+    if rol != "admin":
+        if kullanici_adi:
+            parcalar.append("(il = :k_il OR ekleyen_kullanici = :k_kullanici)")
+            params.update(k_il=sorumlu_il, k_kullanici=kullanici_adi)
+        else:
+            parcalar.append("il = :k_il"); params['k_il'] = sorumlu_il
+    elif iller:
+        parcalar.append("il IN :iller"); params['iller'] = tuple(iller)
+    if durumlar:
+        parcalar.append("durum IN :durumlar"); params['durumlar'] = tuple(durumlar)
+    if kelime and kelime.strip():
+        # Her kelime ayrı ayrı geçmeli; LIKE '%..%' pg_trgm GIN indeksinden faydalanır
+        for i, parca in enumerate(metni_normalle(kelime).split()):
+            parcalar.append(f"arama_metni LIKE :kelime_{i} ESCAPE '\\'"); params[f'kelime_{i}'] = f"%{_like_kacis(parca)}%"
+        params['ham'] = metni_normalle(kelime)
+    return (" AND ".join(parcalar) or "1=1"), params
+
+# --- TİPLİ ÇERÇEVE ---
+# Tekrarlayan metinler kategori, gün farkı nullable tamsayı, tarihler tek datetime sütunu olarak tutulur.
+# '-' gibi yer tutucular yalnızca gösterimde (gosterime_hazirla / Styler na_rep) eklenir.
+KATEGORIK_SUTUNLAR = ['durum', 'il', 'marka', 'arac_kategori', 'uretim_ulkesi']
+TARIH_SUTUNLARI = ['basvuru_tarihi', 'secim_tarihi']
+BAYRAK_SUTUNLARI = ['silme_talebi', 'uyari_gonderildi']
+
+def cerceveyi_isle(df):
+    if df.empty: return df
+    for c in TARIH_SUTUNLARI:
+        if c in df.columns: df[c] = pd.to_datetime(df[c], errors='coerce')
+    df['Geçen Gün'] = (pd.Timestamp.now().normalize() - df['secim_tarihi']).dt.days.astype('Int32')
+    for c in KATEGORIK_SUTUNLAR:
+        if c in df.columns: df[c] = df[c].astype('category')
+    for c in BAYRAK_SUTUNLARI:
+        if c in df.columns: df[c] = df[c].astype('Int8')
+    return df
+
+def gosterime_hazirla(df):
+    # Dosyaya yazılacak parçalar için: tarihler metin, boş hücreler '-'
+    df = df.assign(**{c: df[c].dt.strftime('%Y-%m-%d') for c in TARIH_SUTUNLARI if c in df.columns})
+    return df.astype(object).where(df.notna(), '-')
+
+@surum_onbellekli
+@olculen()
+def verileri_getir(engine, kosul=("1=1", {}), son_id=None, limit=None, sira="id DESC", tablo='denetimler'):
+    where, params = kosul[0], dict(kosul[1])
+    if son_id is not None: where += " AND id < :son_id"; params['son_id'] = int(son_id)
+    sql = f"SELECT * FROM {tablo_dogrula(tablo)} WHERE {where} ORDER BY {sira}"
+    if limit: sql += " LIMIT :limit"; params['limit'] = int(limit)
+    try: return cerceveyi_isle(pd.read_sql_query(sorgu_hazirla(sql, params), engine, params=params))
+    except: return hata_sonucu(pd.DataFrame())
+
+def kosul_ekle(kosul, sql, **params):
+    return f"{kosul[0]} AND {sql}", {**kosul[1], **params}
+
+# --- YAZDIKÇA ARA (İşlem Paneli seçim kutuları) ---
+# upper(alan) text_pattern_ops indeksleriyle önek araması; tarayıcıya en fazla ONERI_LIMITI seçenek gider
+ONEK_ALANLARI = ['sasi_no', 'basvuru_no']
+ONERI_LIMITI = 20
+
+@surum_onbellekli
+@olculen()
+def kayit_ara(engine, kosul, alan, onek="", limit=ONERI_LIMITI):
+    if alan not in ONEK_ALANLARI: raise ValueError(alan)
+    where, params = kosul[0], dict(kosul[1])
+    if onek and onek.strip():
+        where += f" AND upper({alan}) LIKE :onek ESCAPE '\\'"; params['onek'] = _like_kacis(onek.strip().upper()) + "%"
+        sira = f"upper({alan}), id DESC"
+    else: sira = "id DESC"
+    params['limit'] = int(limit)
+    sql = f"SELECT id, basvuru_no, sasi_no, firma_adi FROM denetimler WHERE {where} ORDER BY {sira} LIMIT :limit"
+    try: return pd.read_sql_query(sorgu_hazirla(sql, params), engine, params=params)
+    except: return hata_sonucu(pd.DataFrame(columns=['id', 'basvuru_no', 'sasi_no', 'firma_adi']))
+
+@olculen()
+def arama_sonuclari(engine, kosul, limit=SAYFA_BOYUTU, tablo='denetimler'):
+    # Sunucu tarafında sıralanmış en iyi eşleşmeler (keyset yerine sıralı ilk N)
+    return verileri_getir(engine, kosul, limit=limit, sira=ARAMA_SIRASI if trigram_var_mi(engine) else YEDEK_ARAMA_SIRASI, tablo=tablo)
+
+@surum_onbellekli
+@olculen()
+def dagilim_getir(engine, kosul, kolon, limit=None, tablo='denetimler'):
+    where, params = kosul[0], dict(kosul[1])
+    sql = f"SELECT {kolon}, COUNT(*) AS count FROM {tablo_dogrula(tablo)} WHERE {where} GROUP BY {kolon} ORDER BY count DESC"
+    if limit: sql += " LIMIT :limit"; params['limit'] = int(limit)
+    try: return pd.read_sql_query(sorgu_hazirla(sql, params), engine, params=params)
+    except: return hata_sonucu(pd.DataFrame(columns=[kolon, 'count']))
+
+# --- ÖZET TABLO: (il, durum, marka) başına adet ---
+# Tetikleyiciler denetimler üzerindeki her INSERT/UPDATE/DELETE ifadesinde geçiş tablolarından
+# net farkı uygular; dashboard birkaç yüz satırlık bu tabloyu okur. NULL değerler '-' olarak tutulur.
+_OZET_ANAHTAR = "coalesce(il, '-'), coalesce(durum, '-'), coalesce(marka, '-')"
+# Özet satırları her yolda (il, durum, marka) sırasıyla kilitlenir: toplu aktarım ile arşivleme gibi çok anahtarlı
+# iki ifade aynı satırları ters sırada alıp kilitlenmesin (deadlock). Silme de negatif farklı aynı upsert'tir.
+OZET_FONKSIYONU = f"""CREATE OR REPLACE FUNCTION denetim_ozet_guncelle() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO denetim_ozet AS o SELECT {_OZET_ANAHTAR}, COUNT(*) FROM yeni GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+            ON CONFLICT (il, durum, marka) DO UPDATE SET adet = o.adet + EXCLUDED.adet;
+        ELSIF TG_OP = 'UPDATE' THEN
+            INSERT INTO denetim_ozet AS o
+            SELECT il, durum, marka, SUM(fark) FROM (
+                SELECT {_OZET_ANAHTAR}, -1 FROM eski
+                UNION ALL SELECT {_OZET_ANAHTAR}, 1 FROM yeni) f (il, durum, marka, fark)
+            GROUP BY 1, 2, 3 HAVING SUM(fark) <> 0 ORDER BY 1, 2, 3
+            ON CONFLICT (il, durum, marka) DO UPDATE SET adet = o.adet + EXCLUDED.adet;
+            DELETE FROM denetim_ozet WHERE adet <= 0;
+        ELSE
+            INSERT INTO denetim_ozet AS o SELECT {_OZET_ANAHTAR}, -COUNT(*) FROM eski GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+            ON CONFLICT (il, durum, marka) DO UPDATE SET adet = o.adet + EXCLUDED.adet;
+            DELETE FROM denetim_ozet WHERE adet <= 0;
+        END IF;
+        RETURN NULL;
+    END $$"""
+OZET_DDL = [
+    "CREATE TABLE denetim_ozet (il TEXT NOT NULL, durum TEXT NOT NULL, marka TEXT NOT NULL, adet INTEGER NOT NULL, PRIMARY KEY (il, durum, marka))",
+    OZET_FONKSIYONU,
+    "CREATE TRIGGER trg_ozet_ekle AFTER INSERT ON denetimler REFERENCING NEW TABLE AS yeni FOR EACH STATEMENT EXECUTE FUNCTION denetim_ozet_guncelle()",
+    "CREATE TRIGGER trg_ozet_guncelle AFTER UPDATE ON denetimler REFERENCING OLD TABLE AS eski NEW TABLE AS yeni FOR EACH STATEMENT EXECUTE FUNCTION denetim_ozet_guncelle()",
+    "CREATE TRIGGER trg_ozet_sil AFTER DELETE ON denetimler REFERENCING OLD TABLE AS eski FOR EACH STATEMENT EXECUTE FUNCTION denetim_ozet_guncelle()",
+    f"INSERT INTO denetim_ozet SELECT {_OZET_ANAHTAR}, COUNT(*) FROM denetimler GROUP BY 1, 2, 3",
+]
+
+@surum_onbellekli
+@olculen()
+def ozet_getir(engine, kosul):
+    # kosul yalnızca il/durum içermeli (kelime araması canlı sorguyla yapılır)
+    where, params = kosul
+    try: return pd.read_sql_query(sorgu_hazirla(f"SELECT il, durum, marka, adet FROM denetim_ozet WHERE {where}", params), engine, params=params)
+    except: return hata_sonucu(pd.DataFrame(columns=['il', 'durum', 'marka', 'adet']))
+
+def ozet_dagilimi(ozet_df, kolon, limit=None):
+    d = ozet_df.groupby(kolon, as_index=False)['adet'].sum().rename(columns={'adet': 'count'}).sort_values('count', ascending=False)
+    return d.head(limit) if limit else d
+
+# --- DEĞİŞİKLİK AKIŞI ---
+# Her INSERT/UPDATE satıra tek bir sıradan artan degisiklik_no verir, silinen id'ler günlüğe aynı
+# sıradan numara alarak yazılır. Oturum "N'den sonra ne değişti" diye sorar ve sayfasını yamalar.
+DEGISIKLIK_DDL = [
+    "CREATE SEQUENCE IF NOT EXISTS denetim_degisiklik_seq",
+    "ALTER TABLE denetimler ADD COLUMN IF NOT EXISTS degisiklik_no BIGINT",
+    "UPDATE denetimler SET degisiklik_no = nextval('denetim_degisiklik_seq') WHERE degisiklik_no IS NULL",
+    "ALTER TABLE denetimler ALTER COLUMN degisiklik_no SET DEFAULT nextval('denetim_degisiklik_seq')",
+    """CREATE OR REPLACE FUNCTION degisiklik_no_ata() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN NEW.degisiklik_no := nextval('denetim_degisiklik_seq'); RETURN NEW; END $$""",
+    "CREATE TRIGGER trg_degisiklik_no BEFORE UPDATE ON denetimler FOR EACH ROW EXECUTE FUNCTION degisiklik_no_ata()",
+    "CREATE INDEX IF NOT EXISTS ix_denetimler_degisiklik ON denetimler (degisiklik_no)",
+    """CREATE TABLE IF NOT EXISTS silinen_kayitlar (degisiklik_no BIGINT PRIMARY KEY DEFAULT nextval('denetim_degisiklik_seq'),
+        denetim_id INTEGER NOT NULL, silinme TIMESTAMP NOT NULL DEFAULT now())""",
+    """CREATE OR REPLACE FUNCTION silinenleri_kaydet() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN INSERT INTO silinen_kayitlar (denetim_id) SELECT id FROM eski; RETURN NULL; END $$""",
+    "CREATE TRIGGER trg_silinen AFTER DELETE ON denetimler REFERENCING OLD TABLE AS eski FOR EACH STATEMENT EXECUTE FUNCTION silinenleri_kaydet()",
+]
+# degisiklik_no yazma anında (nextval) alınır, commit sırasına göre değil: geç commit olan bir transaction'ın
+# satırı, oturum daha büyük bir numarayı gördükten sonra görünür olabilir. Bu yüzden sürüm, satırı yazan
+# transaction'ın kimliği (degisiklik_xid) üzerinden bir pg_snapshot'tır: "bu anlık görüntüde görünmeyen her
+# transaction'ın yazdıkları" sorulur. Sürüm her sürece ait olduğundan delta sorgusu önbelleğe alınmaz.
+DEGISIKLIK_XID_DDL = [
+    "ALTER TABLE denetimler ADD COLUMN IF NOT EXISTS degisiklik_xid xid8 NOT NULL DEFAULT pg_current_xact_id()",
+    """CREATE OR REPLACE FUNCTION degisiklik_no_ata() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN NEW.degisiklik_no := nextval('denetim_degisiklik_seq'); NEW.degisiklik_xid := pg_current_xact_id(); RETURN NEW; END $$""",
+    "CREATE INDEX IF NOT EXISTS ix_denetimler_degisiklik_xid ON denetimler (degisiklik_xid)",
+    "ALTER TABLE silinen_kayitlar ADD COLUMN IF NOT EXISTS degisiklik_xid xid8 NOT NULL DEFAULT pg_current_xact_id()",
+    "CREATE INDEX IF NOT EXISTS ix_silinen_kayitlar_xid ON silinen_kayitlar (degisiklik_xid)",
+]
+DEGISIKLIK_LIMITI = 500     # bundan fazla değişiklik varsa tam yükleme daha ucuz
+DEGISIKLIK_YOKLAMA_SN = 5   # süreç içi sürüm değişmediyse delta en fazla bu sıklıkta sorulur
+SILINEN_SAKLAMA_GUN = 1
+# Anlık görüntüden sonra commit olmuş (ya da o an sürmekte olan) transaction'lar; xmin altı indeksle elenir
+_GORUNMEYEN = "degisiklik_xid >= pg_snapshot_xmin(CAST(:surum AS pg_snapshot)) AND NOT pg_visible_in_snapshot(degisiklik_xid, CAST(:surum AS pg_snapshot))"
+
+def degisiklik_surumu(engine):
+    # Sayfa okunmadan önce alınır; arada commit olanlar bir sonraki deltada tekrar gelir (yama idempotent)
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT CAST(pg_current_snapshot() AS text)")).scalar()
+
+@surum_onbellekli
+def surumlu_sayfa(engine, kosul, son_id=None, limit=SAYFA_BOYUTU):
+    # (sürüm, sayfa): sürüm okumadan önce alınır ve sayfayla birlikte paylaşılan önbellekte durur;
+    # önbellekten gelen eski bir sayfa, oturumun ilk deltasıyla bu sürümden itibaren güncellenir
+    surum = degisiklik_surumu(engine)
+    return surum, verileri_getir.__wrapped__(engine, kosul, son_id=son_id, limit=limit)
+
+@olculen()
+def degisiklikleri_getir(engine, kosul, surum, limit=DEGISIKLIK_LIMITI):
+    # (değişen satırlar + koşula uyup uymadıkları 'eslesir' sütununda, silinen id'ler, yeni sürüm); çok fazlaysa None
+    where, params = kosul[0], {**kosul[1], 'surum': surum, 'limit': int(limit) + 1}
+    sql = f"SELECT *, CASE WHEN {where} THEN 1 ELSE 0 END AS eslesir FROM denetimler WHERE {_GORUNMEYEN} ORDER BY degisiklik_no LIMIT :limit"
+    try:
+        yeni = degisiklik_surumu(engine)
+        degisen = pd.read_sql_query(sorgu_hazirla(sql, params), engine, params=params)
+        if len(degisen) > limit: return None
+        silinen = pd.read_sql_query(text(f"SELECT denetim_id FROM silinen_kayitlar WHERE {_GORUNMEYEN}"), engine, params={'surum': surum})
+    except: return None
+    return cerceveyi_isle(degisen), silinen['denetim_id'].tolist(), yeni
+
+def cerceveyi_yamala(df, degisen, silinen, alt_id=None, ust_id=None):
+    # Değişen/silinen satırlar çıkarılır; koşula hâlâ uyanlar (alt_id, ust_id) aralığındaysa geri eklenir
+    ekle = degisen[degisen['eslesir'] == 1].drop(columns='eslesir')
+    if alt_id is not None: ekle = ekle[ekle['id'] > alt_id]
+    if ust_id is not None: ekle = ekle[ekle['id'] < ust_id]
+    kalan = df[~df['id'].isin(set(silinen) | set(degisen['id']))]
+    sonuc = (pd.concat([kalan, ekle], ignore_index=True) if not ekle.empty else kalan).sort_values('id', ascending=False, ignore_index=True)
+    return sonuc.astype({c: 'category' for c in KATEGORIK_SUTUNLAR if c in sonuc.columns})
+
+def silinen_kayitlari_temizle(engine, gun=SILINEN_SAKLAMA_GUN):
+    # Günlükten eski kayıtlar düşer; bu kadar eski sürümle gelen oturum zaten tam yükleme yapar (ONBELLEK_OMRU)
+    with engine.begin() as conn:
+        return conn.execute(text("DELETE FROM silinen_kayitlar WHERE silinme < now() - make_interval(days => :gun)"), {'gun': int(gun)}).rowcount
+
+# --- YÖNETİCİ: BEKLEYEN İŞLER VE TOPLU İŞLEMLER ---
+# Sayaçlar tek sorguda ve sürüm önbelleğinden gelir (silme talepleri kısmi indeksi: göç 13). Toplu işlemler
+# seçilen id listesiyle tek transaction'da çalışır; koşuldaki durum kontrolü başka bir yöneticinin
+# aynı anda işlediği satırları etkilenmeden bırakır.
+TOPLU_ISLEMLER = {
+    'kullanici_onayla': "UPDATE kullanicilar SET onay_durumu = 1 WHERE id = ANY(:idler) AND onay_durumu = 0",
+    'kullanici_reddet': "DELETE FROM kullanicilar WHERE id = ANY(:idler) AND onay_durumu = 0",
+    'silme_onayla': "DELETE FROM denetimler WHERE id = ANY(:idler) AND silme_talebi = 1",
+    'silme_reddet': "UPDATE denetimler SET silme_talebi = 0, silme_nedeni = NULL WHERE id = ANY(:idler) AND silme_talebi = 1",
+}
+
+@surum_onbellekli
+def bekleyen_sayilari(engine):
+    with engine.connect() as conn:
+        onay, silme = conn.execute(text("""SELECT (SELECT COUNT(*) FROM kullanicilar WHERE onay_durumu = 0),
+            (SELECT COUNT(*) FROM denetimler WHERE silme_talebi = 1)""")).one()
+    return {'onay': onay, 'silme': silme}
+
+@surum_onbellekli
+def onay_bekleyenler(engine):
+    return pd.read_sql_query(text("SELECT id, kullanici_adi, email, sorumlu_il FROM kullanicilar WHERE onay_durumu = 0 ORDER BY id"), engine)
+
+@olculen()
+def toplu_uygula(engine, islem, idler):
+    if not idler: return 0
+    with engine.begin() as conn:
+        adet = conn.execute(text(TOPLU_ISLEMLER[islem]), {'idler': [int(i) for i in idler]}).rowcount
+    veri_surumunu_artir()
+    return adet
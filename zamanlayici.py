@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+from olcum import olculen
+from aktarim import gecici_dosyalari_temizle
+from arsiv import arsivle_ve_goruntule
+from bildirim import BEKLEME_SN, mail_kuyruga_ekle, kutuyu_bosalt, mail_kutusunu_temizle
+from veritabani import havuz_olustur, veri_surumunu_artir, silinen_kayitlari_temizle
+
+# --- 3 GÜN GECİKME OTOMASYONU ---
+GECIKME_GUN = 3
+GECIKME_KONTROL_SN = 3600
+GECIKEN_INDEKS = "CREATE INDEX IF NOT EXISTS ix_denetimler_sasi_bekleyen ON denetimler (secim_tarihi) WHERE durum = 'Şasi Bekliyor' AND uyari_gonderildi = 0"
+
+@olculen()
+def geciken_islemleri_kontrol_et_ve_bildir(engine, admin_mail):
+    # Tek UPDATE ... RETURNING: işaretleme ve bildirim aynı transaction'da, kısmi indeks üzerinden
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""UPDATE denetimler SET uyari_gonderildi = 1
+            WHERE durum = 'Şasi Bekliyor' AND uyari_gonderildi = 0 AND secim_tarihi <= CURRENT_DATE - %s
+            RETURNING il, basvuru_no, firma_adi, CURRENT_DATE - secim_tarihi""", (GECIKME_GUN,))
+        gecikenler = sorted(cursor.fetchall(), key=lambda r: (str(r[0]), -r[3]))
+        if gecikenler:
+            icerik = "Sayın Yönetici,<br><br>Aşağıdaki başvurular sisteme eklenmelerinin üzerinden <b>3 günden fazla</b> zaman geçmesine rağmen hala <b>'Şasi Bekliyor'</b> durumundadır ve işlem yapılmamıştır:<br><br>"
+            icerik += "<br>".join(f"📍 <b>İl:</b> {k_il} | 📄 <b>Başvuru:</b> {b_no} | 🏢 <b>Firma:</b> {f_adi} <i>({fark} gündür bekliyor)</i>" for k_il, b_no, f_adi, fark in gecikenler)
+            icerik += "<br><br>Lütfen ilgili illerin uzmanları ile iletişime geçerek süreci hızlandırınız."
+            mail_kuyruga_ekle(cursor, admin_mail, "🚨 Geciken Şasi Atamaları (3+ Gün)", icerik)
+        conn.commit()
+    finally: conn.close()
+    if gecikenler: veri_surumunu_artir()
+    return len(gecikenler)
+
+# --- ZAMANLAYICI ---
+# Sayfa trafiğinden bağımsız çalışır. Birden çok süreçte çalışması zararsızdır:
+# UPDATE ... RETURNING aynı satırı iki kez döndürmez, mail kutusu SKIP LOCKED ile paylaşılır.
+_zamanlayici = {'thread': None}
+_zamanlayici_kilidi = threading.Lock()
+
+def _dongu(gorevler):
+    sonraki = {ad: 0.0 for ad, _, _ in gorevler}
+    while True:
+        for ad, periyot, fonk in gorevler:
+            if time.monotonic() >= sonraki[ad]:
+                try: fonk()
+                except Exception: pass
+                sonraki[ad] = time.monotonic() + periyot
+        time.sleep(max(1.0, min(sonraki.values()) - time.monotonic()))
+
+def zamanlayiciyi_baslat(gorevler):
+    with _zamanlayici_kilidi:
+        if _zamanlayici['thread'] is None or not _zamanlayici['thread'].is_alive():
+            _zamanlayici['thread'] = threading.Thread(target=_dongu, args=(gorevler,), name="zamanlayici", daemon=True)
+            _zamanlayici['thread'].start()
+
+TEMIZLIK_SN = 24 * 3600
+ARSIV_SN = 24 * 3600
+GECICI_TEMIZLIK_SN = 3600
+
+def standart_gorevler(engine, admin_mail, arsiv_klasoru=None):
+    return [('geciken_kontrol', GECIKME_KONTROL_SN, lambda: geciken_islemleri_kontrol_et_ve_bildir(engine, admin_mail)),
+            ('silinen_temizligi', TEMIZLIK_SN, lambda: silinen_kayitlari_temizle(engine)),
+            ('mail_kutusu_temizligi', TEMIZLIK_SN, lambda: mail_kutusunu_temizle(engine)),
+            ('arsivleme', ARSIV_SN, lambda: arsivle_ve_goruntule(engine, arsiv_klasoru)),
+            ('gecici_dosya_temizligi', GECICI_TEMIZLIK_SN, gecici_dosyalari_temizle)]
+
+# --- BAĞIMSIZ ÇALIŞTIRMA: python zamanlayici.py ---
+if __name__ == "__main__":
+    engine = havuz_olustur(os.environ["DB_URI"], havuz_boyutu=2, ek_baglanti=0)
+    smtp = {'sunucu': os.environ.get("SMTP_SUNUCU", "smtp.gmail.com"), 'port': int(os.environ.get("SMTP_PORT", 465)),
+            'kullanici': os.environ["GONDERICI_MAIL"], 'sifre': os.environ["GONDERICI_SIFRE"].replace(" ", "")}
+    print("⏰ Zamanlayıcı çalışıyor (Ctrl+C ile durdurun)...")
+    _dongu(standart_gorevler(engine, os.environ["ADMIN_MAIL"], os.environ.get("ARSIV_KLASORU")) + [('mail_kutusu', BEKLEME_SN, lambda: kutuyu_bosalt(engine, smtp))])